@@ -3,18 +3,37 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import logging
+import os
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional
 
-from src.download import Downloader
-from rich.console import Console
-from rich.logging import RichHandler
+if TYPE_CHECKING:
+    from rich.console import Console
 
 
-def parse_args() -> argparse.Namespace:
+# Defaults for the credential/concurrency options. When none of those flags are
+# passed, these are applied directly and the full parser is never built.
+_DOWNLOAD_DEFAULTS = {
+    "service_account_file": None,
+    "credentials_file": Path("credentials.json"),
+    "api_key": None,
+    "max_drive_workers": 4,
+    "max_http_workers": 8,
+    "max_config_workers": 1,
+}
+
+
+def _build_bootstrap_parser() -> argparse.ArgumentParser:
+    """Parser for config selection and run-mode flags only."""
     parser = argparse.ArgumentParser(
-        description="Download datasets defined in YAML configs."
+        description="Download datasets defined in YAML configs.",
+        add_help=False,
+        # Abbreviated flags fall through to the full parser, which knows every
+        # option and can reject ambiguous prefixes consistently
+        allow_abbrev=False,
     )
     parser.add_argument(
         "source",
@@ -49,9 +68,44 @@ def parse_args() -> argparse.Namespace:
         choices=["DEBUG", "INFO", "WARNING", "ERROR"],
         help="Logging level (default: INFO)",
     )
+    parser.add_argument(
+        "--manifest-only",
+        action="store_true",
+        help="Enumerate Google Drive files and write manifest without downloading.",
+    )
+    parser.add_argument(
+        "--verify-only",
+        action="store_true",
+        help="Skip downloads and verify local files against manifests.",
+    )
+    parser.add_argument(
+        "--skip-verify",
+        action="store_true",
+        help="Skip checksum/size verification after downloads (faster but unsafe).",
+    )
+    parser.add_argument(
+        "--fast-verify",
+        action="store_true",
+        help=(
+            "Record xxh3 digests in Drive manifests and verify with them when present "
+            "(much faster than md5; detects corruption, not tampering). Requires xxhash."
+        ),
+    )
+    parser.add_argument(
+        "--progress",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Show progress bars (use --no-progress to disable).",
+    )
+    return parser
+
+
+def _add_download_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add Google authentication and worker-count options."""
     parser.add_argument(
         "--service-account-file",
         type=Path,
+        default=_DOWNLOAD_DEFAULTS["service_account_file"],
         help=(
             "Path to Google service account JSON file. "
             "Alternative to GOOGLE_SERVICE_ACCOUNT_FILE env var. "
@@ -62,7 +116,7 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--credentials-file",
         type=Path,
-        default=Path("credentials.json"),
+        default=_DOWNLOAD_DEFAULTS["credentials_file"],
         help=(
             "Path to OAuth2 credentials JSON file (default: credentials.json). "
             "Alternative to GOOGLE_CREDENTIALS_FILE env var. "
@@ -72,6 +126,7 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--api-key",
+        default=_DOWNLOAD_DEFAULTS["api_key"],
         help=(
             "Google API key (not recommended, may be blocked). "
             "Alternative to GOOGLE_API_KEY env var or .env file. "
@@ -81,43 +136,89 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument(
         "--max-drive-workers",
         type=int,
-        default=4,
+        default=_DOWNLOAD_DEFAULTS["max_drive_workers"],
         help="Maximum concurrent Google Drive downloads (default: 4).",
     )
     parser.add_argument(
         "--max-http-workers",
         type=int,
-        default=8,
+        default=_DOWNLOAD_DEFAULTS["max_http_workers"],
         help="Maximum concurrent HTTP downloads (default: 8).",
     )
     parser.add_argument(
-        "--manifest-only",
-        action="store_true",
-        help="Enumerate Google Drive files and write manifest without downloading.",
-    )
-    parser.add_argument(
-        "--verify-only",
-        action="store_true",
-        help="Skip downloads and verify local files against manifests.",
-    )
-    parser.add_argument(
-        "--skip-verify",
-        action="store_true",
-        help="Skip checksum/size verification after downloads (faster but unsafe).",
+        "--max-config-workers",
+        type=int,
+        default=_DOWNLOAD_DEFAULTS["max_config_workers"],
+        help=(
+            "Maximum configs processed concurrently with --all (default: 1). "
+            "Only applies with --no-progress. Each config authenticates and "
+            "rate-limits Drive requests on its own, so N workers send up to N "
+            "times the per-config Drive request rate."
+        ),
     )
-    parser.add_argument(
-        "--progress",
-        action=argparse.BooleanOptionalAction,
-        default=True,
-        help="Show progress bars (use --no-progress to disable).",
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Two-phase parse: the bootstrap parser handles the common invocation, and the
+    full parser is only built when unknown flags (or --help) are present.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    bootstrap = _build_bootstrap_parser()
+    args, rest = bootstrap.parse_known_args(argv)
+    if not rest:
+        for key, value in _DOWNLOAD_DEFAULTS.items():
+            setattr(args, key, value)
+        return args
+
+    # Re-parse everything so positionals consumed around unknown flags are resolved correctly
+    parser = argparse.ArgumentParser(
+        description=bootstrap.description, parents=[bootstrap]
     )
-    return parser.parse_args()
+    _add_download_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def _process_config(
+    config_path: Path, args: argparse.Namespace, console: Optional[Console]
+) -> Optional[str]:
+    """Download a single config. Returns the source name on failure, else None."""
+    # Heavy imports are deferred so `--help` and argument errors stay fast
+    from src.download import Downloader
+
+    source_name = config_path.stem
+    logging.info("Processing config: %s", source_name)
+
+    try:
+        downloader = Downloader(
+            config_path=config_path,
+            base_output_dir=args.output_dir,
+            api_key=args.api_key,
+            service_account_file=args.service_account_file,
+            credentials_file=args.credentials_file,
+            max_http_workers=args.max_http_workers,
+            max_drive_workers=args.max_drive_workers,
+            manifest_only=args.manifest_only,
+            verify_only=args.verify_only,
+            verify_downloads=not args.skip_verify,
+            fast_verify=args.fast_verify,
+            use_progress=args.progress,
+            console=console,
+        )
+        downloader.download_all(overwrite=args.overwrite)
+    except Exception as e:
+        logging.error("Failed to process config %s: %s", source_name, e)
+        return source_name
+    return None
 
 
 def main() -> None:
     args = parse_args()
 
     if args.progress:
+        from rich.console import Console
+        from rich.logging import RichHandler
+
         console = Console()
         logging.basicConfig(
             level=getattr(logging, args.log_level),
@@ -142,7 +243,15 @@ def main() -> None:
 
     # Determine which configs to process
     if args.all:
-        config_files = sorted(args.config_dir.glob("*.yaml"))
+        try:
+            with os.scandir(args.config_dir) as it:
+                config_files = sorted(
+                    Path(entry.path)
+                    for entry in it
+                    if entry.name.endswith(".yaml") and entry.is_file()
+                )
+        except (FileNotFoundError, NotADirectoryError):
+            config_files = []
         if not config_files:
             logging.error("No YAML config files found in %s", args.config_dir)
             sys.exit(1)
@@ -159,32 +268,33 @@ def main() -> None:
         )
         sys.exit(1)
 
-    # Process each config
-    failed = []
-    for config_path in config_paths:
-        source_name = config_path.stem
-        logging.info("Processing config: %s", source_name)
+    # Configs are independent and IO-bound, so they may run concurrently (opt-in,
+    # see --max-config-workers). Rich only allows one live progress display per
+    # console, so progress mode stays serial.
+    if args.progress and args.max_config_workers > 1:
+        logging.warning(
+            "--max-config-workers is ignored with progress bars; use --no-progress"
+        )
+    max_workers = 1 if args.progress else max(1, args.max_config_workers)
+    max_workers = min(max_workers, len(config_paths))
 
-        try:
-            downloader = Downloader(
-                config_path=config_path,
-                base_output_dir=args.output_dir,
-                api_key=args.api_key,
-                service_account_file=args.service_account_file,
-                credentials_file=args.credentials_file,
-                max_http_workers=args.max_http_workers,
-                max_drive_workers=args.max_drive_workers,
-                manifest_only=args.manifest_only,
-                verify_only=args.verify_only,
-                verify_downloads=not args.skip_verify,
-                use_progress=args.progress,
-                console=console,
-            )
-            downloader.download_all(overwrite=args.overwrite)
-        except Exception as e:
-            logging.error("Failed to process config %s: %s", source_name, e)
-            failed.append(source_name)
-            continue
+    failed = []
+    if max_workers == 1:
+        for config_path in config_paths:
+            source_name = _process_config(config_path, args, console)
+            if source_name is not None:
+                failed.append(source_name)
+    else:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_process_config, config_path, args, None)
+                for config_path in config_paths
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                source_name = future.result()
+                if source_name is not None:
+                    failed.append(source_name)
+        failed.sort()
 
     if failed:
         logging.error(
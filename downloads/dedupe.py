@@ -3,88 +3,271 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
+import itertools
 import json
+import mmap
+import operator
+import os
+import shutil
 import sys
-from datetime import datetime
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: C parser/serializer, falls back to stdlib json
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # optional: incremental parser for very large manifests
+    ijson = None
+
+# (deduped, conflict_paths, entries_before, duplicates_removed, md5_missing)
+DedupeResult = Tuple[List[Dict[str, Any]], Dict[str, List[str]], int, int, int]
 
 
 def _load_manifest(path: Path) -> List[dict]:
     try:
-        return json.loads(path.read_text(encoding="utf-8"))
+        if orjson is None:
+            return json.loads(path.read_bytes())
+        # Parse straight from the page cache; avoids copying the file into a bytes object
+        with path.open("rb") as handle, mmap.mmap(
+            handle.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mm, memoryview(mm) as view:
+            return orjson.loads(view)
     except Exception as exc:
         print(f"ERROR: Failed to read manifest {path}: {exc}", file=sys.stderr)
         raise
 
 
-def _write_manifest(path: Path, manifest: List[dict]) -> None:
-    path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-
+def _iter_manifest(path: Path) -> Iterator[dict]:
+    """
+    Yield manifest entries, streaming from disk when ijson is available.
 
-def dedupe_manifest(
-    dataset_dir: Path,
-    dry_run: bool = False,
-    backup: bool = True,
-    report_file: Optional[Path] = None,
-) -> Dict:
+    Some ijson backends (yajl2_c) reject integers beyond 64 bits that the
+    in-memory parsers accept; on a parse error the rest of the manifest is
+    read with _load_manifest instead.
     """
-    Dedupe identical entries in .manifest.json by (path, md5).
-    - Keeps the first occurrence of each unique (path, md5) pair, preserving order.
-    - Skips subsequent entries with the same (path, md5).
-    - Does NOT resolve naming conflicts (same path with different md5); these are reported.
+    if ijson is None:
+        yield from _load_manifest(path)
+        return
+
+    yielded = 0
+    try:
+        with path.open("rb") as handle:
+            for entry in ijson.items(handle, "item", use_float=True):
+                yield entry
+                yielded += 1
+    except ijson.JSONError as exc:
+        print(
+            f"WARNING: Streaming parse of {path} failed ({exc}); "
+            f"reading it in memory instead",
+            file=sys.stderr,
+        )
+        yield from itertools.islice(_load_manifest(path), yielded, None)
+    except Exception as exc:
+        print(f"ERROR: Failed to read manifest {path}: {exc}", file=sys.stderr)
+        raise
+
+
+def _write_json(path: Path, data: object) -> None:
+    """Write small, human-read JSON (reports) with indentation."""
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        path.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+
+def _dumps_entry(entry: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_INDENT_2)
+    # Manifests are machine-read; without indent the stdlib uses its C encoder
+    return json.dumps(entry).encode("utf-8")
+
+
+def _write_manifest(path: Path, manifest: Iterable[dict]) -> None:
+    """Write a manifest one entry at a time so the full document is never built in memory."""
+    with path.open("wb") as handle:
+        write = handle.write
+        dumps = _dumps_entry
+        write(b"[")
+        separator = b"\n"
+        for entry in manifest:
+            write(separator)
+            write(dumps(entry))
+            separator = b",\n"
+        write(b"\n]\n" if separator != b"\n" else b"]\n")
+
+
+def _dedupe_entries(
+    entries: Iterable[Dict[str, Any]], keep_entries: bool = True
+) -> DedupeResult:
     """
-    manifest_path = dataset_dir / ".manifest.json"
-    if not manifest_path.exists():
-        raise FileNotFoundError(f"Manifest not found: {manifest_path}")
+    Single-pass dedupe over manifest entries.
 
-    entries = _load_manifest(manifest_path)
+    Returns (deduped, conflict_paths, entries_before, duplicates_removed, md5_missing).
+    With keep_entries=False only counts and conflicts are computed and deduped is empty.
+    """
+    # One ordered dict is both the membership index and the result. Entries
+    # without an md5 are never deduped; they get a unique (position, None) key
+    # so they keep their place in the output without a parallel list.
+    by_key: Dict[Tuple[Any, Optional[str]], Optional[Dict[str, Any]]] = {}
+    # First md5 seen per path; a set is only allocated once a path conflicts
+    first_md5: Dict[str, str] = {}
+    conflicts: Dict[str, Set[str]] = {}
+    entries_before: int = 0
+    duplicates_removed: int = 0
+    md5_missing: int = 0
+    md5: Optional[str]
+    rel_path: Optional[str]
 
-    seen_keys: Set[Tuple[str, Optional[str]]] = set()
-    md5s_by_path: Dict[str, Set[str]] = {}
-    deduped: List[dict] = []
-    duplicates_removed = 0
-    md5_missing = 0
+    # Bind hot-loop methods to locals to skip per-iteration attribute lookups
+    intern = sys.intern
+    path_md5 = operator.itemgetter("path", "md5")
+    first_md5_setdefault = first_md5.setdefault
 
     for entry in entries:
-        rel_path = entry.get("path")
-        md5 = entry.get("md5")
+        entries_before += 1
+        try:
+            # Downloader manifests always carry both keys (md5 may be null)
+            rel_path, md5 = path_md5(entry)
+        except KeyError:
+            rel_path, md5 = entry.get("path"), entry.get("md5")
 
         if md5 is None:
             # If md5 is missing, do not attempt to dedupe; preserve as-is
             md5_missing += 1
-            deduped.append(entry)
+            if keep_entries:
+                by_key[(entries_before, None)] = entry
             continue
 
         key = (rel_path, md5)
-        if key in seen_keys:
+        if key in by_key:
             duplicates_removed += 1
             continue
 
-        seen_keys.add(key)
+        # Kept entries share one string object per distinct md5/path value
+        entry["md5"] = md5 = intern(md5)
         if rel_path is not None:
-            md5s_by_path.setdefault(rel_path, set()).add(md5)
-        deduped.append(entry)
+            entry["path"] = rel_path = intern(rel_path)
+            prev = first_md5_setdefault(rel_path, md5)
+            if prev != md5:
+                conflicts.setdefault(rel_path, {prev}).add(md5)
+        by_key[(rel_path, md5)] = entry if keep_entries else None
 
-    conflict_paths = {p: sorted(list(md5s)) for p, md5s in md5s_by_path.items() if len(md5s) > 1}
+    deduped = list(by_key.values()) if keep_entries else []
+    # Report conflicts in order of each path's first appearance, not of when
+    # its second md5 showed up
+    conflict_paths = (
+        {p: sorted(conflicts[p]) for p in first_md5 if p in conflicts}
+        if conflicts
+        else {}
+    )
+    return deduped, conflict_paths, entries_before, duplicates_removed, md5_missing
+
+
+def _dedupe_entries_pandas(entries: List[Dict[str, Any]]) -> DedupeResult:
+    """
+    Vectorized equivalent of _dedupe_entries using pandas.
+
+    Only the (path, md5) columns are lifted into a DataFrame; the original
+    entry dicts are selected by mask so their values round-trip unchanged.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(entries, columns=["path", "md5"])
+    has_md5 = df["md5"].notna()
+    duplicate = df.duplicated(subset=["path", "md5"], keep="first") & has_md5
+    deduped = [
+        entry for entry, dup in zip(entries, duplicate.to_numpy()) if not dup
+    ]
+
+    with_md5 = df[has_md5 & df["path"].notna()]
+    md5_counts = with_md5.groupby("path", sort=False)["md5"].nunique()
+    conflicting = md5_counts.index[md5_counts > 1]
+    conflict_paths: Dict[str, List[str]] = {}
+    if len(conflicting):
+        grouped = (
+            with_md5[with_md5["path"].isin(conflicting)]
+            .groupby("path", sort=False)["md5"]
+            .unique()
+        )
+        conflict_paths = {p: sorted(md5s) for p, md5s in grouped.items()}
+
+    return (
+        deduped,
+        conflict_paths,
+        len(entries),
+        int(duplicate.sum()),
+        int((~has_md5).sum()),
+    )
+
+
+def dedupe_manifest(
+    dataset_dir: Path,
+    dry_run: bool = False,
+    backup: bool = True,
+    report_file: Optional[Path] = None,
+    use_pandas: bool = False,
+) -> Dict:
+    """
+    Dedupe identical entries in .manifest.json by (path, md5).
+    - Keeps the first occurrence of each unique (path, md5) pair, preserving order.
+    - Skips subsequent entries with the same (path, md5).
+    - Does NOT resolve naming conflicts (same path with different md5); these are reported.
+    - use_pandas computes the same result with vectorized pandas operations
+      (loads the whole manifest; falls back to the streaming loop if pandas is missing).
+    """
+    manifest_path = dataset_dir / ".manifest.json"
+    if not manifest_path.exists():
+        raise FileNotFoundError(f"Manifest not found: {manifest_path}")
+
+    if use_pandas:
+        try:
+            import pandas  # noqa: F401
+        except ImportError:
+            print("WARNING: pandas not installed, using pure-Python dedupe", file=sys.stderr)
+            use_pandas = False
+
+    if use_pandas:
+        result = _dedupe_entries_pandas(_load_manifest(manifest_path))
+    else:
+        # A dry run only reports counts, so skip retaining the entries themselves
+        result = _dedupe_entries(_iter_manifest(manifest_path), keep_entries=not dry_run)
+    deduped, conflict_paths, entries_before, duplicates_removed, md5_missing = result
 
     stats = {
         "dataset_dir": str(dataset_dir),
-        "entries_before": len(entries),
-        "entries_after": len(deduped),
+        "entries_before": entries_before,
+        "entries_after": entries_before - duplicates_removed,
         "duplicates_removed": duplicates_removed,
         "md5_missing_entries": md5_missing,
         "conflicting_paths": len(conflict_paths),
     }
 
     # Write outputs
-    if not dry_run:
-        if backup and duplicates_removed:
-            timestamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
-            backup_path = manifest_path.with_suffix(f".json.bak.{timestamp}")
-            backup_path.write_text(json.dumps(entries, indent=2), encoding="utf-8")
-        if duplicates_removed:
-            _write_manifest(manifest_path, deduped)
+    if not dry_run and duplicates_removed:
+        # Write the new manifest beside the original and swap it in atomically;
+        # the backup copy and the new write overlap on separate threads.
+        tmp_path = manifest_path.with_suffix(".json.tmp")
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(_write_manifest, tmp_path, deduped)]
+                if backup:
+                    timestamp = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+                    backup_path = manifest_path.with_suffix(f".json.bak.{timestamp}")
+                    # Raw copy of the untouched original (copy_file_range/sendfile where available)
+                    futures.append(
+                        executor.submit(shutil.copyfile, manifest_path, backup_path)
+                    )
+                for future in futures:
+                    future.result()
+            os.replace(tmp_path, manifest_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
 
     # Report
     report = {
@@ -96,13 +279,15 @@ def dedupe_manifest(
             ]
         },
     }
-    if report_file is None:
-        report_file = dataset_dir / "dedupe_report.json"
-    try:
-        report_file.write_text(json.dumps(report, indent=2), encoding="utf-8")
-    except Exception:
-        # Non-fatal; still return stats
-        pass
+    # Nothing to report for an already-clean manifest unless a path was requested
+    if report_file is not None or duplicates_removed or conflict_paths:
+        if report_file is None:
+            report_file = dataset_dir / "dedupe_report.json"
+        try:
+            _write_json(report_file, report)
+        except Exception:
+            # Non-fatal; still return stats
+            pass
 
     return report
 
@@ -132,6 +317,11 @@ def parse_args() -> argparse.Namespace:
         type=Path,
         help="Optional path to write a JSON report (default: <dataset-dir>/dedupe_report.json).",
     )
+    parser.add_argument(
+        "--pandas",
+        action="store_true",
+        help="Use vectorized pandas dedupe (faster on very large manifests, loads all entries).",
+    )
     return parser.parse_args()
 
 
@@ -142,6 +332,7 @@ def main() -> None:
         dry_run=args.dry_run,
         backup=not args.no_backup,
         report_file=args.report_file,
+        use_pandas=args.pandas,
     )
     stats = report.get("stats", {})
     print(
@@ -7,18 +7,138 @@ Remove specific rows from parquet files based on path patterns.
 from __future__ import annotations
 
 import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 import pyarrow.parquet as pq
 from rich.console import Console
 from rich.progress import track
 
+# Each worker holds a whole shard table (content included) while rewriting it,
+# so the default stays low enough for ~500 MB shards on a 32 GB machine
+DEFAULT_WORKERS = 4
+
+
+def _match_paths(paths, exclude_patterns: list[str]):
+    """
+    Boolean match of a path column (array or dataset field) against the patterns.
+    
+    A single pattern uses Arrow's literal substring kernel; several are joined
+    into one escaped alternation so the column is still scanned only once.
+    """
+    if len(exclude_patterns) == 1:
+        return pc.match_substring(paths, exclude_patterns[0])
+    return pc.match_substring_regex(
+        paths, "|".join(re.escape(p) for p in exclude_patterns)
+    )
+
+
+def _matches_from_stats(stats, exclude_patterns: list[str]) -> int | None:
+    """
+    Number of matching rows in a row group if its path statistics decide it, else None.
+    
+    Min/max cannot rule a substring out in general, but every value between
+    min and max shares their common prefix: a pattern inside that prefix
+    matches every non-null row, and a group with min == max (or only nulls)
+    is decided by that one value.
+    """
+    if stats is None:
+        return None
+    non_null = stats.num_values
+    if non_null == 0:
+        return 0
+    if not stats.has_min_max:
+        return None
+    prefix = os.path.commonprefix([stats.min, stats.max])
+    if any(pattern in prefix for pattern in exclude_patterns):
+        return non_null
+    if stats.min == stats.max:
+        return 0
+    return None
+
+
+def _count_matches(parquet: pq.ParquetFile, exclude_patterns: list[str]) -> int:
+    """Count rows whose path matches, reading only row groups the statistics leave undecided."""
+    metadata = parquet.metadata
+    path_column = next(
+        i for i in range(metadata.num_columns) if metadata.schema.column(i).path == 'path'
+    )
+    
+    matches = 0
+    undecided = []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(path_column).statistics
+        known = _matches_from_stats(stats, exclude_patterns)
+        if known is None:
+            undecided.append(i)
+        else:
+            matches += known
+    
+    if undecided:
+        paths = parquet.read_row_groups(undecided, columns=['path'])['path']
+        # Null paths never match
+        mask = pc.fill_null(_match_paths(paths, exclude_patterns), False)
+        matches += pc.sum(mask).as_py() or 0
+    return matches
+
+
+def _process_one(
+    parquet_file: Path, exclude_patterns: list[str], dry_run: bool
+) -> tuple[Path, int | None, int, str | None]:
+    """
+    Filter a single parquet file in a worker process.
+    
+    Returns (parquet_file, original_rows, rows_removed, error). original_rows is
+    None when the file has no 'path' column. Only plain values cross the
+    process boundary.
+    """
+    try:
+        dataset = ds.dataset(parquet_file, format="parquet")
+        if 'path' not in dataset.schema.names:
+            return parquet_file, None, 0, None
+        
+        if not exclude_patterns:
+            return parquet_file, dataset.count_rows(), 0, None
+        
+        # Count matches from footer statistics and the path column only; most
+        # files have none and are never fully read (content is the bulk of each shard)
+        parquet = pq.ParquetFile(parquet_file)
+        rows_to_remove = _count_matches(parquet, exclude_patterns)
+        original_rows = parquet.metadata.num_rows
+        exclude_expr = _match_paths(pc.field("path"), exclude_patterns)
+        
+        if rows_to_remove > 0 and not dry_run:
+            # Only files with matches are fully read and rewritten. The keep
+            # predicate is applied by the scanner batch by batch, so no separate
+            # mask is built over the whole table; null paths never match and are kept.
+            keep_expr = ~exclude_expr | pc.field("path").is_null()
+            filtered_table = dataset.to_table(filter=keep_expr)
+            
+            # Write back to the same file
+            pq.write_table(
+                filtered_table,
+                parquet_file,
+                compression='zstd',
+                compression_level=3,
+                use_dictionary=['source', 'file_type', 'extension'],
+                write_statistics=True,
+            )
+        
+        return parquet_file, original_rows, rows_to_remove, None
+    except Exception as e:
+        return parquet_file, None, 0, str(e)
+
 
 def filter_parquet_files(
     data_dir: Path,
     exclude_patterns: list[str],
     dry_run: bool = False,
     fast_mode: bool = True,
+    workers: int = DEFAULT_WORKERS,
 ) -> None:
     """
     Remove rows from parquet files where the 'path' column matches any exclude pattern.
@@ -28,6 +148,7 @@ def filter_parquet_files(
         exclude_patterns: List of patterns to match in the 'path' column (e.g., 'dedupe_report.json')
         dry_run: If True, show what would be removed without modifying files
         fast_mode: If True, only check first and last parquet in each subset (much faster)
+        workers: Maximum parquet files processed at once (one process each)
     """
     console = Console()
     
@@ -72,50 +193,30 @@ def filter_parquet_files(
     total_removed = 0
     files_modified = 0
     
-    for parquet_file in track(parquet_files, description="Processing files"):
-        try:
-            # Read the parquet file
-            table = pq.read_table(parquet_file)
-            original_rows = len(table)
-            
-            # Get the path column
-            if 'path' not in table.column_names:
+    # Files are independent; spread read/decompress/rewrite across processes
+    workers = max(1, min(workers, os.cpu_count() or 1, len(parquet_files)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_process_one, parquet_file, exclude_patterns, dry_run)
+            for parquet_file in parquet_files
+        ]
+        for future in track(
+            as_completed(futures), total=len(futures), description="Processing files"
+        ):
+            parquet_file, original_rows, rows_to_remove, error = future.result()
+            if error is not None:
+                console.print(f"[red]Error processing {parquet_file.name}: {error}[/red]")
+            elif original_rows is None:
                 console.print(f"[yellow]Skipping {parquet_file.name}: no 'path' column[/yellow]")
-                continue
-            
-            paths = table['path'].to_pylist()
-            
-            # Find rows to keep (inverse of exclude patterns)
-            keep_mask = [
-                not any(pattern in path for pattern in exclude_patterns)
-                for path in paths
-            ]
-            
-            rows_to_remove = original_rows - sum(keep_mask)
-            
-            if rows_to_remove > 0:
+            elif rows_to_remove > 0:
                 files_modified += 1
                 total_removed += rows_to_remove
                 
                 console.print(
                     f"[cyan]{parquet_file.relative_to(data_dir)}[/cyan]: "
                     f"removing {rows_to_remove} row(s) "
-                    f"({original_rows} → {sum(keep_mask)})"
+                    f"({original_rows} → {original_rows - rows_to_remove})"
                 )
-                
-                if not dry_run:
-                    # Filter the table
-                    filtered_table = table.filter(keep_mask)
-                    
-                    # Write back to the same file
-                    pq.write_table(
-                        filtered_table,
-                        parquet_file,
-                        compression='snappy',
-                    )
-        
-        except Exception as e:
-            console.print(f"[red]Error processing {parquet_file.name}: {e}[/red]")
     
     console.print(f"\n[bold]Summary[/bold]")
     console.print(f"Files modified: [yellow]{files_modified}[/yellow]")
@@ -153,6 +254,15 @@ def main() -> None:
         action="store_true",
         help="Check all files instead of just first/last in each subset (slower)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=(
+            f"Parquet files processed in parallel (default: {DEFAULT_WORKERS}). "
+            "Each worker loads a whole file, so raise with care on large shards."
+        ),
+    )
     
     args = parser.parse_args()
     
@@ -165,6 +275,7 @@ def main() -> None:
         exclude_patterns=args.exclude,
         dry_run=args.dry_run,
         fast_mode=not args.full_scan,
+        workers=args.workers,
     )
     
     return 0
@@ -5,8 +5,15 @@
 from __future__ import annotations
 
 import argparse
+import array
+import hashlib
+import os
+import re
 import sys
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
 import pyarrow as pa
 import pyarrow.parquet as pq
@@ -15,9 +22,30 @@ from rich.console import Console
 from rich.progress import track
 from rich.table import Table
 
+try:
+    import re2
+except ImportError:  # optional: linear-time RE2 matcher, falls back to stdlib re
+    re2 = None
+
 # Ensure output isn't buffered
 sys.stdout.reconfigure(line_buffering=True)
 
+# File type by lowercased extension; anything else is "other"
+_EXT_TYPE = {
+    **dict.fromkeys(['.jpg', '.jpeg', '.tif', '.tiff', '.png'], "image"),
+    **dict.fromkeys(['.txt', '.md', '.json'], "text"),
+    **dict.fromkeys(['.wav', '.mp3'], "audio"),
+    **dict.fromkeys(['.mp4', '.mov'], "video"),
+    **dict.fromkeys(['.pdf', '.xls', '.xlsx'], "document"),
+}
+
+# array.array typecodes for integer columns buffered without Python int boxing
+_ARRAY_TYPECODES = {pa.int64(): 'q', pa.int16(): 'h'}
+
+# A binary array holds at most 2^31 - 1 bytes (32-bit offsets); larger input
+# makes pa.array return a ChunkedArray, which a record batch cannot hold
+_MAX_BATCH_CONTENT_BYTES = 2**31 - 1
+
 
 def convert_to_parquet(
     source_dir: Path,
@@ -25,6 +53,7 @@ def convert_to_parquet(
     max_shard_bytes: int = 500 * 1024 * 1024,
     exclude_patterns: list[str] | None = None,
     large_files_dir: Path | None = None,
+    skip_unchanged: bool = False,
 ):
     """
     Convert directory of files to Parquet with size-based sharding.
@@ -38,9 +67,13 @@ def convert_to_parquet(
     Large files (>2GB) are automatically split into 1GB chunks and stored
     across multiple rows. Use chunk_index and total_chunks columns to
     reassemble them.
+    
+    Every row carries the SHA-256 of its whole file. With skip_unchanged, the
+    existing shards are kept as-is when every file's path, size and digest
+    still match them.
     """
     console = Console()
-    exclude_patterns = exclude_patterns or ['.manifest.json', '__MACOSX', '.DS_Store']
+    exclude_patterns = exclude_patterns or ['.manifest.json', '.epstractor_hash_cache.json', '__MACOSX', '.DS_Store']
     
     # PyArrow's limit for a single binary value
     MAX_FILE_SIZE = 2_000_000_000  # ~2GB (slightly under 2^31 bytes)
@@ -54,10 +87,7 @@ def convert_to_parquet(
     
     # Collect files
     console.print("[cyan]Scanning files...[/cyan]")
-    files = []
-    for f in source_dir.rglob('*'):
-        if f.is_file() and not any(p in str(f) for p in exclude_patterns):
-            files.append(f)
+    files = list(_walk_files(source_dir, exclude_patterns))
     
     if not files:
         console.print("[yellow]No files found[/yellow]")
@@ -65,118 +95,82 @@ def convert_to_parquet(
     
     console.print(f"[green]Found {len(files):,} files[/green]\n")
     
+    # Digests computed while checking for changes are reused for the new shards
+    digests: dict[str, bytes] = {}
+    if skip_unchanged:
+        existing_shards = _existing_shards(output_path)
+        prior = _load_prior_digests(existing_shards)
+        if prior and _files_unchanged(files, source_dir, prior, digests):
+            console.print("[green]✓ Unchanged since last conversion, keeping existing shards[/green]\n")
+            return {
+                "name": source_dir.name,
+                "total_files": len(files),
+                "total_bytes": sum(size for _, size in files),
+                "shard_count": len(existing_shards),
+            }
+    
     # Define schema
+    # Low-cardinality strings are dictionary-typed; chunk counters fit int16
+    # (1GB chunks, so up to ~32TB per file)
     schema = pa.schema([
         ('path', pa.string()),
-        ('source', pa.string()),
-        ('file_type', pa.string()),
+        ('source', pa.dictionary(pa.int16(), pa.string())),
+        ('file_type', pa.dictionary(pa.int8(), pa.string())),
         ('file_size', pa.int64()),
-        ('extension', pa.string()),
+        ('extension', pa.dictionary(pa.int16(), pa.string())),
         ('content', pa.binary()),
         ('content_available', pa.bool_()),  # True if full content is available
-        ('chunk_index', pa.int32()),  # 0 for non-chunked files, 0..N for chunked
-        ('total_chunks', pa.int32()),  # 1 for non-chunked files, N+1 for chunked
+        ('chunk_index', pa.int16()),  # 0 for non-chunked files, 0..N for chunked
+        ('total_chunks', pa.int16()),  # 1 for non-chunked files, N+1 for chunked
+        ('sha256', pa.binary(32)),  # digest of the whole file (same on every chunk)
     ])
     
     # Process files and write shards
     console.print("[cyan]Converting to parquet...[/cyan]")
     
-    shard_num = 0
-    current_shard_data = []
-    current_shard_size = 0
+    shards = ShardWriter(output_path, schema, max_shard_bytes, source=source_dir.name)
     total_bytes = 0
     chunked_files = 0
     
-    for file_path in track(files, description="Processing"):
+    loaded = _prefetch_files(files, source_dir, digests)
+    for file_path, size, rel_path, future in track(loaded, total=len(files), description="Processing"):
         try:
-            # Check file size first
-            size = file_path.stat().st_size
             total_bytes += size
+            # Mapped and hashed ahead of time on a worker thread
+            mapped, digest = future.result()
             
             # Classify file type
             ext = file_path.suffix.lower()
-            if ext in {'.jpg', '.jpeg', '.tif', '.tiff', '.png'}:
-                file_type = "image"
-            elif ext in {'.txt', '.md', '.json'}:
-                file_type = "text"
-            elif ext in {'.wav', '.mp3'}:
-                file_type = "audio"
-            elif ext in {'.mp4', '.mov'}:
-                file_type = "video"
-            elif ext in {'.pdf', '.xls', '.xlsx'}:
-                file_type = "document"
-            else:
-                file_type = "other"
+            file_type = _EXT_TYPE.get(ext, "other")
             
             # Handle large files (>2GB) - split into chunks
             if size > MAX_FILE_SIZE:
                 chunked_files += 1
-                with open(file_path, 'rb') as f:
-                    chunk_index = 0
-                    while True:
-                        chunk = f.read(CHUNK_SIZE)
-                        if not chunk:
-                            break
-                        
-                        # Calculate total chunks (ceiling division)
-                        total_chunks = (size + CHUNK_SIZE - 1) // CHUNK_SIZE
-                        
-                        current_shard_data.append({
-                            'path': str(file_path.relative_to(source_dir)),
-                            'source': source_dir.name,
-                            'file_type': file_type,
-                            'file_size': size,
-                            'extension': ext,
-                            'content': chunk,
-                            'content_available': True,
-                            'chunk_index': chunk_index,
-                            'total_chunks': total_chunks,
-                        })
-                        
-                        current_shard_size += len(chunk)
-                        chunk_index += 1
-                        
-                        # Write shard if size exceeded
-                        if current_shard_size >= max_shard_bytes:
-                            shard_num += 1
-                            write_shard(output_path, shard_num, current_shard_data, schema)
-                            current_shard_data = []
-                            current_shard_size = 0
+                # Calculate total chunks once per file (ceiling division)
+                total_chunks = -(-size // CHUNK_SIZE)
+                # Chunks are zero-copy slices of one mapping, not 1GB reads
+                for chunk_index, offset in enumerate(range(0, mapped.size, CHUNK_SIZE)):
+                    chunk = memoryview(mapped.slice(offset, min(CHUNK_SIZE, mapped.size - offset)))
+                    shards.append(
+                        rel_path, file_type, size, ext,
+                        chunk, chunk_index, total_chunks, digest,
+                    )
             else:
-                # Normal file - read in one go
-                content = file_path.read_bytes()
-                
-                current_shard_data.append({
-                    'path': str(file_path.relative_to(source_dir)),
-                    'source': source_dir.name,
-                    'file_type': file_type,
-                    'file_size': size,
-                    'extension': ext,
-                    'content': content,
-                    'content_available': True,
-                    'chunk_index': 0,
-                    'total_chunks': 1,
-                })
-                
-                current_shard_size += size
-                
-                # Write shard if size exceeded
-                if current_shard_size >= max_shard_bytes:
-                    shard_num += 1
-                    write_shard(output_path, shard_num, current_shard_data, schema)
-                    current_shard_data = []
-                    current_shard_size = 0
+                # Normal file - mapped rather than copied into a bytes object
+                content = memoryview(mapped)
+                shards.append(
+                    rel_path, file_type, size, ext,
+                    content, 0, 1, digest,
+                )
                 
         except Exception as e:
             console.print(f"[yellow]Skipped {file_path.name}: {e}[/yellow]")
     
     # Write final shard
-    if current_shard_data:
-        shard_num += 1
-        write_shard(output_path, shard_num, current_shard_data, schema)
+    shard_num = shards.close()
     
     # Calculate total shards for consistent naming
-    if shard_num > 1:
+    if shard_num:
         rename_shards(output_path, shard_num)
     
     console.print(f"\n[green]✓ Created {shard_num} shard(s)[/green]")
@@ -196,54 +190,276 @@ def convert_to_parquet(
     }
 
 
-def write_shard(output_path: Path, shard_num: int, data: list[dict], schema: pa.Schema):
-    """Write a single parquet shard."""
-    # Temporary filename (will rename later with correct total)
-    if shard_num == 1:
-        filename = output_path
-    else:
-        filename = output_path.with_name(f"{output_path.stem}-{shard_num:05d}.parquet")
+def _walk_files(root: Path, exclude_patterns: list[str]) -> Iterator[tuple[Path, int]]:
+    """
+    Yield (path, size) for every file under root whose path contains no exclude pattern.
     
-    filename.parent.mkdir(parents=True, exist_ok=True)
+    Directories whose path matches a pattern are pruned without descending,
+    since every file below them would be excluded anyway.
+    """
+    exclude = None
+    if exclude_patterns:
+        # Literal patterns as one alternation; RE2 (when installed) matches it in a single DFA pass
+        alternation = "|".join(map(re.escape, exclude_patterns))
+        exclude = (re2 or re).compile(alternation)
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if exclude is not None and exclude.search(entry.path):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    yield Path(entry.path), entry.stat().st_size
+
+
+def _existing_shards(output_path: Path) -> list[Path]:
+    """Final-named shards from a previous run (output_path itself or {stem}-NNNNN-of-NNNNN)."""
+    return sorted(output_path.parent.glob(f"{output_path.stem}*.parquet"))
+
+
+def _load_prior_digests(shard_paths: list[Path]) -> dict[str, tuple[int, bytes]]:
+    """
+    Map path -> (file_size, sha256) from existing shards.
     
-    # Convert to PyArrow table
-    table = pa.table({
-        'path': [d['path'] for d in data],
-        'source': [d['source'] for d in data],
-        'file_type': [d['file_type'] for d in data],
-        'file_size': [d['file_size'] for d in data],
-        'extension': [d['extension'] for d in data],
-        'content': [d['content'] for d in data],
-        'content_available': [d['content_available'] for d in data],
-        'chunk_index': [d['chunk_index'] for d in data],
-        'total_chunks': [d['total_chunks'] for d in data],
-    }, schema=schema)
+    Empty if there are no shards or they predate the sha256 column. Only the
+    small metadata columns are read, never content.
+    """
+    prior = {}
+    for shard_path in shard_paths:
+        try:
+            table = pq.read_table(shard_path, columns=['path', 'file_size', 'sha256'])
+        except (KeyError, pa.ArrowInvalid):
+            return {}
+        for path, size, digest in zip(*(table[name].to_pylist() for name in table.column_names)):
+            prior[path] = (size, digest)
+    return prior
+
+
+def _files_unchanged(
+    files: list[tuple[Path, int]],
+    source_dir: Path,
+    prior: dict[str, tuple[int, bytes]],
+    digests: dict[str, bytes],
+) -> bool:
+    """True if files match prior exactly by path, size and SHA-256. Fills digests as it hashes."""
+    if len(files) != len(prior):
+        return False
+    rel_files = [(str(file_path.relative_to(source_dir)), file_path, size) for file_path, size in files]
+    # Cheap path/size comparison first; only hash when the listing matches
+    if any(prior.get(rel_path, (None,))[0] != size for rel_path, _, size in rel_files):
+        return False
+    for rel_path, file_path, _ in rel_files:
+        digest = digests[rel_path] = hashlib.sha256(_map_file(file_path)).digest()
+        if digest != prior[rel_path][1]:
+            return False
+    return True
+
+
+def _prefetch_files(
+    files: list[tuple[Path, int]],
+    source_dir: Path,
+    digests: dict[str, bytes],
+    workers: int = 4,
+    depth: int = 16,
+) -> Iterator[tuple[Path, int, str, Future]]:
+    """
+    Yield (path, size, rel_path, future) in order, mapping and hashing files ahead of use.
+    
+    Hashing touches every page, so the disk reads happen on the worker threads
+    (hashlib releases the GIL) while the caller copies and compresses earlier
+    files. At most `depth` files are in flight.
+    """
+    def load(file_path: Path, rel_path: str) -> tuple[pa.Buffer, bytes]:
+        mapped = _map_file(file_path)
+        return mapped, digests.get(rel_path) or hashlib.sha256(mapped).digest()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for file_path, size in files:
+            rel_path = str(file_path.relative_to(source_dir))
+            pending.append((file_path, size, rel_path, executor.submit(load, file_path, rel_path)))
+            if len(pending) >= depth:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
+def _map_file(file_path: Path) -> pa.Buffer:
+    """Memory-map a file read-only; the returned buffer stays valid after the file is closed."""
+    with pa.memory_map(str(file_path), 'r') as source:
+        return source.read_buffer()
+
+
+class ShardWriter:
+    """
+    Stream rows into size-limited parquet shards.
+    
+    Rows are buffered in one list per column and flushed as a record batch
+    every `batch_rows` rows, so a shard is never held in memory as a whole.
+    A new shard is started once the current one reaches `max_shard_bytes`.
+    Columns that are constant for the writer (source, content_available) are
+    not buffered per row; they are materialized once per batch. A batch is
+    also flushed early if the next row would overflow its binary content array.
+    """
     
-    # Write parquet
-    pq.write_table(table, filename, compression='snappy')
+    def __init__(
+        self,
+        output_path: Path,
+        schema: pa.Schema,
+        max_shard_bytes: int,
+        source: str,
+        batch_rows: int = 1024,
+    ):
+        self.output_path = output_path
+        self.schema = schema
+        self.max_shard_bytes = max_shard_bytes
+        self.batch_rows = batch_rows
+        self.shard_num = 0
+        self._writer: pq.ParquetWriter | None = None
+        self._shard_size = 0
+        self._batch_bytes = 0
+        self._constants = {'source': source, 'content_available': True}
+        self._columns: list = []
+        self._appenders: list = []
+        self._new_columns()
+    
+    def append(
+        self,
+        path: str,
+        file_type: str,
+        file_size: int,
+        extension: str,
+        content,
+        chunk_index: int,
+        total_chunks: int,
+        sha256: bytes,
+    ) -> None:
+        """Add one row (a whole file or one chunk of a large file)."""
+        if self._writer is None:
+            self._open_shard()
+        elif self._batch_bytes + len(content) > _MAX_BATCH_CONTENT_BYTES:
+            self._flush()
+        
+        # Bound appenders in schema order, minus the constant columns
+        (
+            add_path, add_file_type, add_file_size, add_extension,
+            add_content, add_chunk_index, add_total_chunks, add_sha256,
+        ) = self._appenders
+        num_rows = len(self._columns[0])
+        try:
+            add_path(path)
+            add_file_type(file_type)
+            add_file_size(file_size)
+            add_extension(extension)
+            add_content(content)
+            add_chunk_index(chunk_index)
+            add_total_chunks(total_chunks)
+            add_sha256(sha256)
+        except BaseException:
+            # Drop the partial row so the columns stay the same length
+            for column in self._columns:
+                del column[num_rows:]
+            raise
+        self._shard_size += len(content)
+        self._batch_bytes += len(content)
+        
+        if self._shard_size >= self.max_shard_bytes:
+            self._close_shard()
+        elif len(self._columns[0]) >= self.batch_rows:
+            self._flush()
+    
+    def close(self) -> int:
+        """Finish the current shard and return the number of shards written."""
+        if self._writer is not None:
+            self._close_shard()
+        return self.shard_num
+    
+    def _open_shard(self) -> None:
+        self.shard_num += 1
+        # Temporary filename (renamed once the total is known); the .tmp suffix
+        # keeps partial output out of *.parquet globs until then
+        filename = _temp_shard_path(self.output_path, self.shard_num)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        
+        # zstd for ratio on blobs/text, dictionary pages for the
+        # low-cardinality string columns, and statistics for row-group pruning
+        self._writer = pq.ParquetWriter(
+            filename,
+            self.schema,
+            compression='zstd',
+            compression_level=3,
+            use_dictionary=['source', 'file_type', 'extension'],
+            write_statistics=True,
+        )
+    
+    def _new_columns(self) -> None:
+        # Integer columns accumulate unboxed in C arrays; everything else in lists
+        self._columns = [
+            array.array(_ARRAY_TYPECODES[field.type]) if field.type in _ARRAY_TYPECODES else []
+            for field in self.schema
+            if field.name not in self._constants
+        ]
+        self._appenders = [column.append for column in self._columns]
+    
+    def _flush(self) -> None:
+        num_rows = len(self._columns[0])
+        if not num_rows:
+            return
+        arrays = []
+        columns = iter(self._columns)
+        for field in self.schema:
+            if field.name in self._constants:
+                arrays.append(pa.repeat(pa.scalar(self._constants[field.name], field.type), num_rows))
+                continue
+            values = next(columns)
+            if isinstance(values, array.array):
+                # Adopt the C buffer directly instead of converting element by element
+                arrays.append(
+                    pa.Array.from_buffers(field.type, len(values), [None, pa.py_buffer(values)])
+                )
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        # Fresh columns: the exported C arrays cannot be resized while Arrow holds them
+        self._new_columns()
+        self._batch_bytes = 0
+    
+    def _close_shard(self) -> None:
+        self._flush()
+        self._writer.close()
+        self._writer = None
+        self._shard_size = 0
+
+
+def _temp_shard_path(output_path: Path, shard_num: int) -> Path:
+    return output_path.with_name(f"{output_path.stem}-{shard_num:05d}.parquet.tmp")
 
 
 def rename_shards(output_path: Path, total_shards: int):
-    """Rename shards with consistent naming: 00000-of-00003.parquet"""
-    # If we only wrote one shard, rename it to 00000-of-00001
-    if total_shards == 1:
-        if output_path.exists():
-            new_name = output_path.with_name(f"{output_path.stem}-00000-of-00001.parquet")
-            output_path.rename(new_name)
-        return
+    """
+    Give temporary shards their final names.
     
-    # First handle the initial file (no number) -> 00000
-    first_file = output_path
-    if first_file.exists():
-        new_name = output_path.with_name(f"{output_path.stem}-00000-of-{total_shards:05d}.parquet")
-        first_file.rename(new_name)
+    A single shard becomes output_path itself; otherwise shards are named
+    00000-of-00003.parquet and so on. Renames are independent and run on a
+    thread pool, which helps on network filesystems where each one is a round-trip.
+    """
+    if total_shards == 1:
+        renames = [(_temp_shard_path(output_path, 1), output_path)]
+    else:
+        # 1-indexed temp names -> 0-indexed final names
+        renames = [
+            (
+                _temp_shard_path(output_path, i),
+                output_path.with_name(f"{output_path.stem}-{(i-1):05d}-of-{total_shards:05d}.parquet"),
+            )
+            for i in range(1, total_shards + 1)
+        ]
     
-    # Then rename numbered files (1-indexed temp names -> 0-indexed final names)
-    for i in range(2, total_shards + 1):
-        old_name = output_path.with_name(f"{output_path.stem}-{i:05d}.parquet")
-        new_name = output_path.with_name(f"{output_path.stem}-{(i-1):05d}-of-{total_shards:05d}.parquet")
-        if old_name.exists():
-            old_name.rename(new_name)
+    with ThreadPoolExecutor(max_workers=min(32, len(renames))) as executor:
+        for _ in executor.map(lambda pair: os.replace(*pair), renames):
+            pass
 
 
 def main():
@@ -252,6 +468,11 @@ def main():
     parser.add_argument("config", help="Config name from huggingface/datasets/configs/")
     parser.add_argument("--configs-dir", type=Path, default=Path("huggingface/datasets/configs"))
     parser.add_argument("--shard-size-mb", type=int, default=500, help="Shard size in MB")
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Keep existing shards when every file's path, size and SHA-256 still match",
+    )
     args = parser.parse_args()
     
     console = Console()
@@ -269,7 +490,10 @@ def main():
     parquet_config = config.get("parquet", {})
     output_dir = Path(parquet_config.get("output_dir", "epstein_all/data"))
     max_shard_bytes = args.shard_size_mb * 1024 * 1024
-    exclude_patterns = parquet_config.get("exclude_patterns", [".manifest.json", "__MACOSX", ".DS_Store"])
+    exclude_patterns = parquet_config.get(
+        "exclude_patterns",
+        [".manifest.json", ".epstractor_hash_cache.json", "__MACOSX", ".DS_Store"],
+    )
     
     # Find datasets
     roots = config.get("roots", ["downloads/datasets"])
@@ -306,6 +530,7 @@ def main():
                 output_path=output_dir / ds_path.name / f"{ds_path.name}.parquet",
                 max_shard_bytes=max_shard_bytes,
                 exclude_patterns=exclude_patterns,
+                skip_unchanged=args.skip_unchanged,
             )
             all_stats.append(stats)
         except Exception as e:
@@ -10,15 +10,33 @@ as separate dataset splits/subsets that users can access independently.
 from __future__ import annotations
 
 import argparse
+import functools
 import logging
 import os
 from pathlib import Path
+from typing import Iterator
 
-from huggingface_hub import HfApi, login
 from rich.console import Console
 from rich.logging import RichHandler
 
 
+# Environment variables checked for a token, in priority order
+_TOKEN_ENV_VARS = ("HF_TOKEN", "HUGGINGFACE_TOKEN", "HUGGING_FACE_HUB_TOKEN")
+
+
+def _resolve_token() -> str | None:
+    """First token set in the environment, if any."""
+    return next(filter(None, map(os.environ.get, _TOKEN_ENV_VARS)), None)
+
+
+@functools.cache
+def _cached_token() -> str | None:
+    """Token saved by `huggingface-cli login` (honours HF_HOME); read once per process."""
+    from huggingface_hub import get_token
+
+    return get_token()
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Upload parquet datasets to HuggingFace Hub with named subsets"
@@ -36,10 +54,10 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument(
         "--token",
-        default=os.environ.get("HF_TOKEN")
-        or os.environ.get("HUGGINGFACE_TOKEN")
-        or os.environ.get("HUGGING_FACE_HUB_TOKEN"),
-        help="HuggingFace token (optional if already logged in with `huggingface-cli login`)",
+        help=(
+            "HuggingFace token (default: HF_TOKEN, HUGGINGFACE_TOKEN or HUGGING_FACE_HUB_TOKEN; "
+            "optional if already logged in with `huggingface-cli login`)"
+        ),
     )
     parser.add_argument(
         "--branch",
@@ -56,6 +74,24 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Show what would be uploaded without uploading",
     )
+    parser.add_argument(
+        "--delete-stale",
+        action="store_true",
+        help=(
+            "Also delete remote parquet files under data/{subset}/ that are not part of "
+            "this upload (e.g. shards with a different -of-NNNNN count). "
+            "Combine with --dry-run to list them first."
+        ),
+    )
+    parser.add_argument(
+        "--high-performance",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help=(
+            "Use huggingface_hub's high-performance Xet transfer mode for parquet uploads "
+            "(use --no-high-performance to fall back to the default transfer path for debugging)."
+        ),
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -65,35 +101,95 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
-def discover_subsets(data_dir: Path) -> dict[str, str]:
+def discover_subsets(data_dir: Path) -> Iterator[tuple[str, list[Path]]]:
     """
     Discover parquet file subsets in data_dir.
     
-    Returns a dict mapping subset names to glob patterns.
+    Yields (subset name, sorted parquet files) for each subdirectory that has any.
     """
-    subsets = {}
-    
     if not data_dir.exists():
         raise FileNotFoundError(f"Data directory not found: {data_dir}")
     
-    # Look for subdirectories containing parquet files
-    for subdir in sorted(data_dir.iterdir()):
-        if subdir.is_dir():
-            parquet_files = list(subdir.glob("*.parquet"))
-            if parquet_files:
-                # Use glob pattern relative to data_dir
-                pattern = f"{subdir.name}/*.parquet"
-                subsets[subdir.name] = str(data_dir / pattern)
-                logging.info(
-                    f"Found subset '{subdir.name}' with {len(parquet_files)} parquet file(s)"
-                )
+    # Look for subdirectories containing parquet files; scandir's cached
+    # d_type answers is_dir/is_file without a stat per entry
+    with os.scandir(data_dir) as it:
+        subdirs = sorted(
+            (entry for entry in it if entry.is_dir()),
+            key=lambda entry: entry.name,
+        )
+    for subdir in subdirs:
+        with os.scandir(subdir.path) as it:
+            parquet_files = sorted(
+                Path(entry.path)
+                for entry in it
+                if entry.name.endswith(".parquet") and entry.is_file()
+            )
+        if parquet_files:
+            yield subdir.name, parquet_files
+
+
+def _stale_remote_files(
+    data_files: dict[str, list[Path]], remote_files: list[str]
+) -> list[str]:
+    """
+    Parquet files on the Hub under data/{subset}/ that this upload does not
+    replace (e.g. shards with a different -of-NNNNN count).
+    """
+    uploading = {
+        f"data/{subset_name}/{parquet_file.name}"
+        for subset_name, parquet_files in data_files.items()
+        for parquet_file in parquet_files
+    }
+    subset_prefixes = tuple(f"data/{subset_name}/" for subset_name in data_files)
+    return [
+        path_in_repo
+        for path_in_repo in remote_files
+        if path_in_repo.startswith(subset_prefixes)
+        and path_in_repo.endswith(".parquet")
+        and path_in_repo not in uploading
+    ]
+
+
+def _build_operations(
+    data_files: dict[str, list[Path]],
+    stale_files: list[str],
+    readme_path: Path | None,
+) -> list:
+    """
+    Commit operations uploading every subset (and the dataset card) at once,
+    deleting stale_files in the same commit.
+    """
+    from huggingface_hub import CommitOperationAdd, CommitOperationDelete
+    
+    operations = []
+    for subset_name, parquet_files in data_files.items():
+        for parquet_file in parquet_files:
+            path_in_repo = f"data/{subset_name}/{parquet_file.name}"
+            operations.append(
+                CommitOperationAdd(path_in_repo=path_in_repo, path_or_fileobj=str(parquet_file))
+            )
+    operations.extend(
+        CommitOperationDelete(path_in_repo=path_in_repo) for path_in_repo in stale_files
+    )
     
-    return subsets
+    if readme_path is not None:
+        operations.append(
+            CommitOperationAdd(path_in_repo="README.md", path_or_fileobj=str(readme_path))
+        )
+    return operations
 
 
 def main() -> None:
     args = parse_args()
     
+    # Read by huggingface_hub at import time, so set before importing it.
+    # Saturates the uplink with parallel chunk transfers for large shards.
+    if args.high_performance:
+        os.environ.setdefault("HF_XET_HIGH_PERFORMANCE", "1")
+    else:
+        os.environ.pop("HF_XET_HIGH_PERFORMANCE", None)
+    from huggingface_hub import HfApi
+    
     console = Console()
     logging.basicConfig(
         level=getattr(logging, args.log_level),
@@ -113,12 +209,11 @@ def main() -> None:
     logger = logging.getLogger(__name__)
     
     # Get token for authentication
-    token = args.token
+    token = args.token or _resolve_token()
     if not token:
-        # Try to read from cached token file
-        token_path = Path.home() / ".cache" / "huggingface" / "token"
-        if token_path.exists():
-            token = token_path.read_text().strip()
+        # Fall back to the token cached by the hub client
+        token = _cached_token()
+        if token:
             logger.info("Using cached HuggingFace credentials")
         else:
             if not args.dry_run:
@@ -133,8 +228,11 @@ def main() -> None:
     
     # Discover subsets
     logger.info(f"Scanning {args.data_dir} for parquet subsets...")
+    data_files = {}
     try:
-        data_files = discover_subsets(args.data_dir)
+        for subset_name, parquet_files in discover_subsets(args.data_dir):
+            data_files[subset_name] = parquet_files
+            logger.info(f"Found subset '{subset_name}' with {len(parquet_files)} parquet file(s)")
     except FileNotFoundError as e:
         logger.error(str(e))
         return
@@ -144,11 +242,7 @@ def main() -> None:
         return
     
     # Count files for each subset
-    subset_file_counts = {}
-    for subset_name in data_files.keys():
-        subset_dir = args.data_dir / subset_name
-        parquet_files = list(subset_dir.glob("*.parquet"))
-        subset_file_counts[subset_name] = len(parquet_files)
+    subset_file_counts = {name: len(files) for name, files in data_files.items()}
     
     # Display what will be uploaded
     console.print("\n[bold cyan]Dataset Upload Configuration[/bold cyan]")
@@ -160,6 +254,20 @@ def main() -> None:
         console.print(f"  • {subset_name}: {count} parquet file(s)")
     
     if args.dry_run:
+        if args.delete_stale:
+            try:
+                stale_files = _stale_remote_files(
+                    data_files,
+                    HfApi(token=token).list_repo_files(
+                        repo_id=args.repo_id, repo_type="dataset", revision=args.branch
+                    ),
+                )
+            except Exception as e:
+                logger.warning(f"Could not list remote files for --delete-stale: {e}")
+            else:
+                console.print(f"\n[bold]Stale remote files to delete:[/bold] {len(stale_files)}")
+                for path_in_repo in stale_files:
+                    console.print(f"  • {path_in_repo}")
         console.print("\n[yellow]Dry run mode - no upload will be performed[/yellow]")
         return
     
@@ -181,39 +289,39 @@ def main() -> None:
         )
         logger.info(f"✓ Repository {args.repo_id} is ready")
         
-        # Upload each subset's parquet files
-        for subset_name in data_files.keys():
-            subset_dir = args.data_dir / subset_name
-            parquet_files = sorted(subset_dir.glob("*.parquet"))
-            
-            logger.info(f"\nUploading {len(parquet_files)} file(s) for subset '{subset_name}'...")
-            
-            # Upload all parquet files for this subset to data/{subset_name}/
-            api.upload_folder(
-                folder_path=str(subset_dir),
-                repo_id=args.repo_id,
-                repo_type="dataset",
-                path_in_repo=f"data/{subset_name}",
-                revision=args.branch,
-                allow_patterns="*.parquet",
-                commit_message=f"Upload {subset_name} parquet files",
-            )
-            
-            logger.info(f"✓ Uploaded {subset_name}")
-        
-        # Also check if there's a README.md to upload
+        # Upload every subset, any stale-shard deletions and the dataset card
+        # in a single commit: one preupload batch and one commit round-trip,
+        # and the Hub never shows a half-updated dataset
         readme_path = args.data_dir.parent / "README.md"
-        if readme_path.exists():
-            logger.info("\nUploading README.md...")
-            api.upload_file(
-                path_or_fileobj=str(readme_path),
-                path_in_repo="README.md",
-                repo_id=args.repo_id,
-                repo_type="dataset",
-                revision=args.branch,
-                commit_message="Upload dataset card",
+        stale_files = []
+        if args.delete_stale:
+            stale_files = _stale_remote_files(
+                data_files,
+                api.list_repo_files(
+                    repo_id=args.repo_id, repo_type="dataset", revision=args.branch
+                ),
             )
-            logger.info("✓ Uploaded README.md")
+            logger.info(f"Deleting {len(stale_files)} stale remote parquet file(s)")
+        operations = _build_operations(
+            data_files,
+            stale_files,
+            readme_path if readme_path.exists() else None,
+        )
+        
+        total_files = sum(subset_file_counts.values())
+        logger.info(
+            f"\nUploading {total_files} parquet file(s) across {len(data_files)} subset(s)"
+            + (" and README.md" if readme_path.exists() else "")
+            + " in one commit..."
+        )
+        api.create_commit(
+            repo_id=args.repo_id,
+            repo_type="dataset",
+            operations=operations,
+            revision=args.branch,
+            commit_message=f"Upload {', '.join(data_files)} parquet files",
+        )
+        logger.info(f"✓ Uploaded {len(data_files)} subset(s)")
         
         console.print(f"\n[bold green]✓ Upload complete![/bold green]")
         console.print(f"\nYour dataset is now available at:")
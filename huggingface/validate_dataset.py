@@ -16,13 +16,182 @@ from __future__ import annotations
 
 import argparse
 import io
+import itertools
+import re
+import sys
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from typing import Callable
 
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
 from datasets import load_dataset
+from huggingface_hub import HfFileSystem
 from rich.console import Console
 from rich.table import Table
 
+try:
+    import ahocorasick
+except ImportError:  # optional: pyahocorasick, used for large exclude-pattern lists
+    ahocorasick = None
+
+try:
+    import pypdf
+except ImportError:  # optional: PDF readability check is skipped without it
+    pypdf = None
+
+try:
+    from PIL import Image
+except ImportError:  # optional: image readability check is skipped without it
+    Image = None
+
+
+# Rows for larger files are skipped while sampling (except in large_files)
+_MAX_SAMPLE_FILE_SIZE = 100 * 1024 * 1024
+
+# Below this many patterns a regex alternation is as fast as building an automaton
+_AHOCORASICK_MIN_PATTERNS = 8
+
+
+def _exclude_matcher(patterns: list[str]) -> Callable[[str], bool]:
+    """Predicate that is true when a path contains any of the patterns."""
+    if ahocorasick is not None and len(patterns) >= _AHOCORASICK_MIN_PATTERNS:
+        # Aho-Corasick scans each path once, independent of the pattern count
+        automaton = ahocorasick.Automaton()
+        for pattern in patterns:
+            automaton.add_word(pattern, pattern)
+        automaton.make_automaton()
+        return lambda path: next(automaton.iter(path), None) is not None
+    
+    # One alternation scans each path once regardless of how many patterns there are
+    exclude_re = re.compile("|".join(map(re.escape, patterns)))
+    return lambda path: exclude_re.search(path) is not None
+
+
+def _progress(message: str) -> None:
+    """Rewrite a plain progress line on stderr (no Rich markup/render in hot loops)."""
+    sys.stderr.write(f"\r{message}\x1b[K")
+    sys.stderr.flush()
+
+
+def _sampling_limit(subset_name: str, sample_size: int) -> tuple[int | None, str]:
+    """Size limit for sampled rows (None for no limit) and the message announcing it."""
+    # Only take smaller files for speed
+    # Exception: large_files config only has 2 files, sample them all regardless of size
+    if subset_name == "large_files":
+        return None, f"  [dim]Sampling all files from {subset_name} (metadata only)...[/dim]"
+    return (
+        _MAX_SAMPLE_FILE_SIZE,
+        f"  [dim]Sampling {sample_size} rows from {subset_name} (skipping files >100MB for speed)...[/dim]",
+    )
+
+
+def _open_arrow_subset(repo_id: str, subset_name: str) -> ds.Dataset | None:
+    """
+    Open data/{subset}/*.parquet on the Hub as a pyarrow dataset.
+    
+    Returns None if the files can't be listed (e.g. a different repo layout),
+    in which case sampling falls back to the datasets stream.
+    """
+    try:
+        return ds.dataset(
+            f"datasets/{repo_id}/data/{subset_name}",
+            format="parquet",
+            filesystem=HfFileSystem(),
+        )
+    except Exception:
+        return None
+
+
+def _sample_arrow_subset(
+    subset_name: str,
+    arrow_dataset: ds.Dataset,
+    sample_size: int,
+    is_excluded: Callable[[str], bool],
+) -> tuple[list[dict], None, None, list[str], list[str]]:
+    """
+    Sample metadata rows with the projection and size limit pushed into the parquet scan.
+    
+    Row groups whose file_size statistics are all over the limit are never
+    downloaded, so rows skipped that way can't be counted (checked/skipped are None).
+    """
+    max_file_size, message = _sampling_limit(subset_name, sample_size)
+    columns = [name for name in arrow_dataset.schema.names if name != "content"]
+    size_filter = None if max_file_size is None else pc.field("file_size") <= max_file_size
+    table = arrow_dataset.scanner(columns=columns, filter=size_filter).head(sample_size)
+    unwanted = [path for path in table.column("path").to_pylist() if is_excluded(path)]
+    return table.to_pylist(), None, None, unwanted, [message]
+
+
+def _sample_subset(
+    subset_name: str,
+    subset,
+    sample_size: int,
+    is_excluded: Callable[[str], bool],
+    show_progress: bool = False,
+) -> tuple[list[dict], int, int, list[str], list[str]]:
+    """
+    Stream rows from one subset until sample_size small files are collected.
+    
+    Returns (samples, checked, skipped_large, unwanted paths, messages); messages
+    are returned rather than printed so concurrent workers don't interleave output.
+    Exclude patterns are checked against every streamed row, not just kept samples.
+    """
+    max_file_size, message = _sampling_limit(subset_name, sample_size)
+    messages = [message]
+    checked = 0
+    skipped_large = 0
+    unwanted = []
+    
+    def small_enough(row: dict) -> bool:
+        nonlocal checked, skipped_large
+        checked += 1
+        if show_progress and checked % 100 == 0:
+            _progress(f"  {subset_name}: checked {checked} files (skipped {skipped_large} large)...")
+        if is_excluded(row["path"]):
+            unwanted.append(row["path"])
+        if max_file_size is not None and row["file_size"] > max_file_size:
+            skipped_large += 1
+            return False
+        return True
+    
+    # Cap the scan so a subset of mostly large files can't stream forever, and
+    # let the lazy dataset filter drop oversized rows before they reach us
+    max_checked = sample_size * 20
+    stream = subset.take(max_checked).filter(small_enough)
+    samples = list(itertools.islice(stream, sample_size))
+    
+    if len(samples) < sample_size and checked >= max_checked:
+        messages.append(f"  [yellow]⚠ {subset_name}: stopping early after checking {checked} files, only found {len(samples)} small files[/yellow]")
+    
+    return samples, checked, skipped_large, unwanted, messages
+
+
+def _fetch_content(subset, paths: set[str], limit: int) -> dict[str, bytes]:
+    """Stream path+content from the start of a subset until every path is found (or limit rows)."""
+    found = {}
+    columns = subset.column_names
+    if columns is not None and "content" not in columns:
+        return found
+    for checked, row in enumerate(subset.select_columns(["path", "content"]), start=1):
+        if row["path"] in paths and row["path"] not in found:
+            found[row["path"]] = row["content"]
+            if len(found) == len(paths):
+                break
+        if checked >= limit:
+            break
+    return found
+
+
+def _fetch_arrow_content(arrow_dataset: ds.Dataset, paths: set[str]) -> dict[str, bytes]:
+    """Read content for the given paths only; path and size statistics prune the row groups read."""
+    if "content" not in arrow_dataset.schema.names:
+        return {}
+    wanted = pc.field("path").isin(list(paths)) & (pc.field("file_size") <= _MAX_SAMPLE_FILE_SIZE)
+    table = arrow_dataset.scanner(columns=["path", "content"], filter=wanted).head(len(paths))
+    return dict(zip(table.column("path").to_pylist(), table.column("content").to_pylist()))
+
 
 def validate_dataset(
     repo_id: str,
@@ -46,6 +215,7 @@ def validate_dataset(
     """
     console = Console()
     exclude_patterns = exclude_patterns or ["dedupe_report.json"]
+    is_excluded = _exclude_matcher(exclude_patterns)
     
     console.print(f"\n[bold cyan]Validating Dataset: {repo_id}[/bold cyan]")
     console.print(f"[dim]Using streaming mode - sampling {sample_size} rows per subset (large files may take time)[/dim]\n")
@@ -124,6 +294,9 @@ def validate_dataset(
         "extension": str,
         "content": bytes,
         "content_available": bool,
+        "chunk_index": int,
+        "total_chunks": int,
+        "sha256": bytes,
     }
     
     large_files_schema = {
@@ -137,58 +310,82 @@ def validate_dataset(
         "content_available": bool,
     }
     
+    # Sampling is bound on Hub range reads, so stream every subset at once;
+    # workers buffer their messages and they are printed in subset order
+    per_subset_samples = {}
+    checked = {}
+    skipped_large = {}
+    unwanted_paths = {}
+    messages = {}
+    column_names = {name: dataset[name].column_names for name in available_subsets}
+    # Parquet is columnar: leave content out of the metadata stream so sampling
+    # doesn't pull file bytes; binary tests fetch content for chosen rows only
+    metadata = {
+        name: dataset[name].select_columns([c for c in columns if c != "content"])
+        if columns and "content" in columns else dataset[name]
+        for name, columns in column_names.items()
+    }
+    # Transient progress only makes sense on a terminal
+    show_progress = sys.stderr.isatty()
+    with ThreadPoolExecutor(max_workers=max(1, len(available_subsets))) as executor:
+        # Prefer a pyarrow scan of the Hub parquet files so the size filter skips
+        # whole row groups; fall back to the datasets stream if they can't be opened
+        arrow_datasets = dict(zip(
+            available_subsets,
+            executor.map(lambda name: _open_arrow_subset(repo_id, name), available_subsets),
+        ))
+        futures = {}
+        for subset_name in available_subsets:
+            if arrow_datasets[subset_name] is not None:
+                future = executor.submit(
+                    _sample_arrow_subset,
+                    subset_name,
+                    arrow_datasets[subset_name],
+                    sample_size,
+                    is_excluded,
+                )
+            else:
+                future = executor.submit(
+                    _sample_subset,
+                    subset_name,
+                    metadata[subset_name],
+                    sample_size,
+                    is_excluded,
+                    show_progress,
+                )
+            futures[future] = subset_name
+        for future in as_completed(futures):
+            subset_name = futures[future]
+            (
+                per_subset_samples[subset_name],
+                checked[subset_name],
+                skipped_large[subset_name],
+                unwanted_paths[subset_name],
+                messages[subset_name],
+            ) = future.result()
+    if show_progress:
+        _progress("")
+    per_subset_samples = {name: per_subset_samples[name] for name in available_subsets}
+    
+    for subset_name in available_subsets:
+        for message in messages[subset_name]:
+            console.print(message)
+    console.print()
+    
     for subset_name in available_subsets:
         console.print(f"[cyan]{subset_name}[/cyan]")
-        subset = dataset[subset_name]
         
         # Select appropriate schema for this subset
         expected_columns = large_files_schema if subset_name == "large_files" else regular_schema
-        
-        # Sample rows (with progress) - only take smaller files for speed
-        # Exception: large_files config only has 2 files, sample them all regardless of size
-        if subset_name == "large_files":
-            console.print(f"  [dim]Sampling all files from {subset_name} (metadata only)...[/dim]")
-            max_file_size = float('inf')  # No size limit for large_files
-        else:
-            console.print(f"  [dim]Sampling {sample_size} rows (skipping files >100MB for speed)...[/dim]")
-            max_file_size = 100 * 1024 * 1024  # 10MB limit for sampling (much stricter)
-        
-        samples = []
-        skipped_large = 0
-        checked = 0
-        
-        # First pass: collect metadata WITHOUT downloading content
-        for sample in subset:
-            checked += 1
-            
-            # Skip very large files to speed up sampling (check size before downloading content)
-            if sample["file_size"] > max_file_size:
-                skipped_large += 1
-                # Don't download content for large files
-                if checked % 100 == 0:
-                    console.print(f"  [dim]Checked {checked} files, sampled {len(samples)}/{sample_size} (skipped {skipped_large} large)...[/dim]", end="\r")
-                continue
-            
-            samples.append(sample)
-            if len(samples) >= sample_size:
-                break
-            
-            if checked % 20 == 0:
-                console.print(f"  [dim]Checked {checked} files, sampled {len(samples)}/{sample_size} (skipped {skipped_large} large)...[/dim]", end="\r")
-            
-            # Stop if we've checked too many files without getting enough samples
-            if checked > sample_size * 20:
-                console.print(f"\n  [yellow]⚠ Stopping early after checking {checked} files, only found {len(samples)} small files[/yellow]")
-                break
+        samples = per_subset_samples[subset_name]
         
         if not samples:
             results["errors"].append(f"{subset_name}: No data found")
             console.print(f"  [red]✗ No data found[/red]")
             continue
         
-        # Check schema from first sample
-        first_sample = samples[0]
-        actual_columns = set(first_sample.keys())
+        # Check schema from dataset features, or the first sample if they're unknown
+        actual_columns = set(column_names[subset_name] or samples[0].keys())
         expected_col_names = set(expected_columns.keys())
         
         missing_cols = expected_col_names - actual_columns
@@ -231,30 +428,32 @@ def validate_dataset(
             else:
                 console.print(f"  [green]✓ All files have content_available=False[/green]")
         
-        # Check for unwanted files
-        unwanted_count = sum(
-            1 for sample in samples 
-            if any(pattern in sample["path"] for pattern in exclude_patterns)
-        )
+        # Check for unwanted files (matched while sampling)
+        unwanted = unwanted_paths[subset_name]
         
-        if unwanted_count > 0:
-            error = f"{subset_name}: Found {unwanted_count} files matching exclude patterns"
+        if unwanted:
+            error = f"{subset_name}: Found {len(unwanted)} files matching exclude patterns"
             results["errors"].append(error)
             console.print(f"  [red]✗ {error}[/red]")
-            # Show examples
-            for sample in samples:
-                if any(pattern in sample["path"] for pattern in exclude_patterns):
-                    console.print(f"    [dim]{sample['path']}[/dim]")
-                    break
+            # Show example
+            console.print(f"    [dim]{unwanted[0]}[/dim]")
         else:
             console.print(f"  [green]✓ No unwanted files found[/green]")
         
-        # Statistics from sample
-        file_types = Counter(s["file_type"] for s in samples)
-        extensions = Counter(s["extension"] for s in samples)
-        content_available = sum(1 for s in samples if s["content_available"])
+        # Statistics from sample (one pass over the rows)
+        file_types = Counter()
+        extensions = Counter()
+        content_available = 0
+        for s in samples:
+            file_types[s["file_type"]] += 1
+            extensions[s["extension"]] += 1
+            if s["content_available"]:
+                content_available += 1
         
-        console.print(f"  [dim]Checked {checked} files, sampled {len(samples)}, skipped {skipped_large} large (>10MB)[/dim]")
+        if checked[subset_name] is None:
+            console.print(f"  [dim]Sampled {len(samples)} (files >100MB skipped by the parquet scan filter)[/dim]")
+        else:
+            console.print(f"  [dim]Checked {checked[subset_name]} files, sampled {len(samples)}, skipped {skipped_large[subset_name]} large (>100MB)[/dim]")
         console.print(f"  [dim]File types: {', '.join(f'{ft}:{ct}' for ft, ct in file_types.most_common(5))}[/dim]")
         console.print(f"  [dim]Top extensions: {', '.join(f'{ext}:{ct}' for ext, ct in extensions.most_common(5))}[/dim]")
         console.print(f"  [dim]Content available: {content_available}/{len(samples)} ({100*content_available/len(samples):.1f}%)[/dim]")
@@ -274,29 +473,54 @@ def validate_dataset(
         test_pdfs = []
         test_images = []
         
-        for subset_name in available_subsets:
+        # Reuse the rows pulled during sampling rather than streaming each subset again
+        for subset_name, samples in per_subset_samples.items():
             # Skip large_files config - it doesn't have embedded content
             if subset_name == "large_files":
                 console.print(f"  [dim]Skipping {subset_name} (no embedded content)[/dim]")
                 continue
                 
-            subset = dataset[subset_name]
-            for sample in subset.take(sample_size):
-                if sample["extension"] == ".pdf" and sample["content_available"] and sample["content"]:
+            for sample in samples:
+                if sample["extension"] == ".pdf" and sample["content_available"]:
                     test_pdfs.append((subset_name, sample))
                     if len(test_pdfs) >= 3:
                         break
-                elif sample["extension"] in [".jpg", ".jpeg", ".png"] and sample["content_available"] and sample["content"]:
+                elif sample["extension"] in [".jpg", ".jpeg", ".png"] and sample["content_available"]:
                     test_images.append((subset_name, sample))
                     if len(test_images) >= 3:
                         break
                 if test_pdfs and test_images:
                     break
         
+        # Fetch content for the chosen rows only; they were all within the first
+        # `checked` rows of their subset, so the stream stops well before the end
+        wanted = {}
+        for subset_name, sample in test_pdfs + test_images:
+            wanted.setdefault(subset_name, set()).add(sample["path"])
+        contents = {
+            subset_name: (
+                _fetch_arrow_content(arrow_datasets[subset_name], paths)
+                if arrow_datasets[subset_name] is not None
+                else _fetch_content(dataset[subset_name], paths, checked[subset_name])
+            )
+            for subset_name, paths in wanted.items()
+        }
+        test_pdfs = [
+            (subset_name, {**sample, "content": contents[subset_name][sample["path"]]})
+            for subset_name, sample in test_pdfs
+            if contents[subset_name].get(sample["path"])
+        ]
+        test_images = [
+            (subset_name, {**sample, "content": contents[subset_name][sample["path"]]})
+            for subset_name, sample in test_images
+            if contents[subset_name].get(sample["path"])
+        ]
+        
         # Test PDF content
         if test_pdfs:
-            try:
-                import pypdf
+            if pypdf is None:
+                console.print(f"  [yellow]⚠ pypdf not installed, skipping PDF test[/yellow]")
+            else:
                 pdf_tested = 0
                 for subset_name, sample in test_pdfs:
                     try:
@@ -312,18 +536,19 @@ def validate_dataset(
                 
                 if pdf_tested > 0:
                     console.print(f"  [green]✓ Successfully tested {pdf_tested} PDF(s)[/green]")
-            except ImportError:
-                console.print(f"  [yellow]⚠ pypdf not installed, skipping PDF test[/yellow]")
         
         # Test image content
         if test_images:
-            try:
-                from PIL import Image
+            if Image is None:
+                console.print(f"  [yellow]⚠ PIL not installed, skipping image test[/yellow]")
+            else:
                 img_tested = 0
                 for subset_name, sample in test_images:
                     try:
                         img_bytes = io.BytesIO(sample["content"])
                         img = Image.open(img_bytes)
+                        # Decode once up front; Image.open only reads the header
+                        img.load()
                         console.print(f"  [green]✓ Image readable: {sample['path'][:50]}... ({img.size[0]}x{img.size[1]})[/green]")
                         img_tested += 1
                     except Exception as e:
@@ -332,8 +557,6 @@ def validate_dataset(
                 
                 if img_tested > 0:
                     console.print(f"  [green]✓ Successfully tested {img_tested} image(s)[/green]")
-            except ImportError:
-                console.print(f"  [yellow]⚠ PIL not installed, skipping image test[/yellow]")
         
         console.print()
     
@@ -403,6 +626,5 @@ def main() -> int:
 
 
 if __name__ == "__main__":
-    import sys
     sys.exit(main())
 
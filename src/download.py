@@ -3,16 +3,34 @@
 from __future__ import annotations
 
 import concurrent.futures
+import contextlib
+import functools
 import hashlib
-import io
+import heapq
 import json
 import logging
+import mmap
+import operator
 import os
+import queue
+import random
 import threading
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Literal, Optional, Tuple
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib.parse import urlparse, unquote
 
 import requests
@@ -24,7 +42,7 @@ from google.oauth2 import service_account
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from googleapiclient.http import MediaIoBaseDownload
+from googleapiclient.http import DEFAULT_CHUNK_SIZE, MediaIoBaseDownload
 from rich.console import Console
 from rich.progress import (
     Progress,
@@ -36,6 +54,26 @@ from rich.progress import (
     MofNCompleteColumn,
 )
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import orjson
+except ImportError:  # optional: C serializer, falls back to stdlib json
+    orjson = None
+
+try:
+    from blake3 import blake3
+except ImportError:  # optional: verifies manifest entries that carry a blake3 digest
+    blake3 = None
+
+try:
+    import xxhash
+except ImportError:  # optional: xxh3 digests for --fast-verify
+    xxhash = None
+
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -46,6 +84,115 @@ ItemKind = Literal["http_file", "gdrive_folder"]
 FILE_DOWNLOAD_DELAY = 2.0  # seconds between file downloads
 
 DRIVE_SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
+DRIVE_FOLDER_MIME_TYPE = "application/vnd.google-apps.folder"
+
+# Bytes per ranged GET for Drive media downloads; each chunk is one HTTPS
+# round-trip, so keep it large (the client's own default, 100 MB)
+DRIVE_CHUNK_SIZE = DEFAULT_CHUNK_SIZE
+
+# Read size for streaming HTTP response bodies to disk
+HTTP_COPY_BUFSIZE = 1024 * 1024
+
+# Manifests with fewer entries than this are verified serially
+VERIFY_PARALLEL_MIN = 4
+
+# Local files up to this size are MD5/xxh3-hashed from a memory map in one update()
+MD5_MMAP_MAX_SIZE = 2 * 1024**3
+
+# Read size bounds (per buffer, two per hashing thread) for files that are not
+# memory-mapped; each file reads in 64 of its filesystem's preferred blocks
+HASH_READ_MIN_BUFSIZE = 1024 * 1024
+HASH_READ_BUFSIZE = 16 * 1024 * 1024
+
+# Per-dataset cache of local file digests, so unchanged files are not re-hashed
+HASH_CACHE_FILENAME = ".epstractor_hash_cache.json"
+
+# Files at least this large are BLAKE3-hashed from a memory map with multiple threads
+BLAKE3_MMAP_MIN_SIZE = 1024 * 1024
+
+# Client-side pacing for Drive API calls (list pages and media chunks), shared by
+# all worker threads; stays under the per-user quota instead of paying 403/429 backoff
+DRIVE_REQUESTS_PER_SECOND = 8.0
+DRIVE_REQUEST_BURST = 16
+
+# Retry policy for transient Drive API errors (rate limits and server errors)
+DRIVE_MAX_RETRIES = 6
+DRIVE_MAX_BACKOFF = 64.0
+DRIVE_RETRY_STATUSES = frozenset({403, 429, 500, 502, 503, 504})
+DRIVE_RATE_LIMIT_REASONS = frozenset({"userRateLimitExceeded", "rateLimitExceeded"})
+
+
+@functools.lru_cache(maxsize=32)
+def _read_yaml(path: str, mtime_ns: int, size: int) -> Any:
+    """Parse a YAML file; cached per (path, mtime, size) so unchanged configs parse once."""
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=YamlLoader)
+
+
+def _manifest_line(entry: Dict[str, Any]) -> bytes:
+    """Serialize one manifest entry as a JSONL line."""
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(entry).encode("utf-8") + b"\n"
+
+
+def _iter_manifest_lines(path: Path) -> Iterable[Dict[str, Any]]:
+    """Yield entries from a JSONL manifest one line at a time."""
+    loads = orjson.loads if orjson is not None else json.loads
+    with path.open("rb") as handle:
+        for line in handle:
+            if line.strip():
+                yield loads(line)
+
+
+def _drive_error_reasons(exc: HttpError) -> List[str]:
+    """Extract the per-error ``reason`` codes from a Drive API error body."""
+    try:
+        errors = json.loads(exc.content)["error"]["errors"]
+        return [err.get("reason", "") for err in errors]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return []
+
+
+def _is_retryable_drive_error(exc: HttpError) -> bool:
+    status = exc.resp.status
+    if status not in DRIVE_RETRY_STATUSES:
+        return False
+    if status == 403:
+        # 403 is also used for permission errors; only rate limits are transient
+        return any(r in DRIVE_RATE_LIMIT_REASONS for r in _drive_error_reasons(exc))
+    return True
+
+
+def _drive_retry(fn, *, retries: int = DRIVE_MAX_RETRIES):
+    """
+    Call fn(), retrying transient Drive errors with capped exponential backoff.
+
+    The wait is the larger of the server's Retry-After and 2**attempt seconds
+    (capped at DRIVE_MAX_BACKOFF), plus jitter so workers don't retry in lockstep.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except HttpError as exc:
+            if attempt >= retries or not _is_retryable_drive_error(exc):
+                raise
+            try:
+                retry_after = float(exc.resp.get("retry-after", 0))
+            except (TypeError, ValueError):
+                retry_after = 0.0
+            delay = max(retry_after, min(2.0**attempt, DRIVE_MAX_BACKOFF))
+            delay += random.uniform(0, 0.5)
+            attempt += 1
+            logger.warning(
+                "Drive API returned %s, retrying in %.1fs (attempt %d/%d)",
+                exc.resp.status,
+                delay,
+                attempt,
+                retries,
+            )
+            time.sleep(delay)
 
 
 @dataclass
@@ -57,6 +204,9 @@ class DownloadItem:
     filename: Optional[str] = None
     folder_id: Optional[str] = None
     recursive: bool = False
+    # Optional expected checksums (hex) for http_file items
+    sha256: Optional[str] = None
+    md5: Optional[str] = None
 
 
 @dataclass
@@ -70,6 +220,323 @@ class SourceConfig:
     items: List[DownloadItem]
 
 
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                self._cond.wait((1 - self._tokens) / self.rate)
+
+
+def _fadvise(fh: BinaryIO, advice: str) -> None:
+    """Best-effort posix_fadvise on an open file (no-op where unsupported)."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        os.posix_fadvise(fh.fileno(), 0, 0, getattr(os, advice))
+    except (AttributeError, OSError):
+        pass
+
+
+# Unnamed temp files need O_TMPFILE (Linux) and /proc to link them into place
+_O_TMPFILE = getattr(os, "O_TMPFILE", 0) if os.path.isdir("/proc/self/fd") else 0
+_tmpfile_support: Dict[int, bool] = {}
+_tmpfile_lock = threading.Lock()
+
+
+def _tmpfile_linkable(directory: Path) -> bool:
+    """Whether O_TMPFILE files in directory can be linked into place (probed once per device)."""
+    if not _O_TMPFILE:
+        return False
+    try:
+        dev = os.stat(directory).st_dev
+    except OSError:
+        return False
+    with _tmpfile_lock:
+        supported = _tmpfile_support.get(dev)
+        if supported is None:
+            supported = False
+            probe = directory / f".tmpfile-probe.{os.getpid()}"
+            try:
+                fd = os.open(directory, _O_TMPFILE | os.O_WRONLY, 0o600)
+                try:
+                    os.link(f"/proc/self/fd/{fd}", probe)
+                    probe.unlink()
+                    supported = True
+                finally:
+                    os.close(fd)
+            except OSError:
+                pass  # no O_TMPFILE on this filesystem, or linking is refused
+            _tmpfile_support[dev] = supported
+    return supported
+
+
+class AtomicFile:
+    """
+    Temp file that only appears at ``dest_path`` once commit() is called.
+
+    Where supported this is an unnamed O_TMPFILE in the destination directory,
+    linked into place on commit, so a failed or killed download leaves nothing
+    behind. Otherwise it falls back to a named ``dest_path + tmp_suffix`` file
+    that is renamed on commit and removed on failure.
+    """
+
+    def __init__(self, dest_path: Path, tmp_suffix: str) -> None:
+        self.dest_path = dest_path
+        self.tmp_suffix = tmp_suffix
+        self._tmp_path: Optional[Path] = None
+        self._committed = False
+        if _tmpfile_linkable(dest_path.parent):
+            try:
+                fd = os.open(dest_path.parent, _O_TMPFILE | os.O_WRONLY, 0o644)
+            except OSError:
+                pass
+            else:
+                self.fh: BinaryIO = os.fdopen(fd, "wb")
+                return
+        self._tmp_path = self._named_tmp_path()
+        self.fh = self._tmp_path.open("wb")
+
+    def _named_tmp_path(self) -> Path:
+        return self.dest_path.with_suffix(self.dest_path.suffix + self.tmp_suffix)
+
+    def commit(self) -> None:
+        self.fh.flush()
+        if self._tmp_path is None:
+            source = f"/proc/self/fd/{self.fh.fileno()}"
+            try:
+                os.link(source, self.dest_path)
+            except FileExistsError:
+                # Overwriting: link under the temp name, then swap atomically.
+                # A leftover of that name (from a killed run) is replaced; once
+                # _tmp_path is set, __exit__ removes it if link/replace fails
+                self._tmp_path = self._named_tmp_path()
+                self._tmp_path.unlink(missing_ok=True)
+                os.link(source, self._tmp_path)
+                os.replace(self._tmp_path, self.dest_path)
+            self.fh.close()
+        else:
+            self.fh.close()
+            os.replace(self._tmp_path, self.dest_path)
+        self._committed = True
+
+    def __enter__(self) -> "AtomicFile":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.fh.close()
+        if not self._committed and self._tmp_path is not None:
+            self._tmp_path.unlink(missing_ok=True)
+
+
+_hash_local = threading.local()
+
+
+def _hash_buffers() -> Tuple[memoryview, memoryview]:
+    """This thread's pair of reusable read buffers for hashing local files."""
+    buffers = getattr(_hash_local, "buffers", None)
+    if buffers is None:
+        buffers = (
+            memoryview(bytearray(HASH_READ_BUFSIZE)),
+            memoryview(bytearray(HASH_READ_BUFSIZE)),
+        )
+        _hash_local.buffers = buffers
+    return buffers
+
+
+def _hash_read_size(st: os.stat_result) -> int:
+    """Read size for hashing a file: 64 filesystem blocks, within the buffer bounds."""
+    blksize = getattr(st, "st_blksize", 4096) or 4096
+    return min(max(blksize * 64, HASH_READ_MIN_BUFSIZE), HASH_READ_BUFSIZE)
+
+
+_hash_reader_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+_hash_reader_pool_lock = threading.Lock()
+
+
+def _get_hash_reader_pool() -> concurrent.futures.ThreadPoolExecutor:
+    """Process-wide pool running the read-ahead side of _hash_stream."""
+    global _hash_reader_pool
+    if _hash_reader_pool is None:
+        with _hash_reader_pool_lock:
+            if _hash_reader_pool is None:
+                _hash_reader_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    thread_name_prefix="hash-reader",
+                )
+    return _hash_reader_pool
+
+
+def _hash_stream(handle: BinaryIO, digest: Any) -> None:
+    """
+    Feed handle to digest until EOF, double-buffered: a pooled reader fills
+    one buffer while this thread hashes the other (both release the GIL).
+    """
+    read_size = _hash_read_size(os.fstat(handle.fileno()))
+    free: "queue.Queue[Optional[memoryview]]" = queue.Queue()
+    for buffer in _hash_buffers():
+        free.put(buffer[:read_size])
+    filled: "queue.Queue[Tuple[Any, int]]" = queue.Queue()
+    stop = threading.Event()
+
+    def reader() -> None:
+        try:
+            while True:
+                buffer = free.get()
+                if buffer is None or stop.is_set():
+                    return
+                n = handle.readinto(buffer)
+                filled.put((buffer, n))
+                if not n:
+                    return
+        except BaseException as exc:
+            filled.put((exc, 0))
+
+    future = _get_hash_reader_pool().submit(reader)
+    try:
+        while True:
+            buffer, n = filled.get()
+            if isinstance(buffer, BaseException):
+                raise buffer
+            if not n:
+                break
+            digest.update(buffer[:n])
+            free.put(buffer)
+    finally:
+        # Wake a reader parked on free.get() (e.g. when update() raised) and
+        # wait for it: the buffers belong to this thread and are reused
+        stop.set()
+        free.put(None)
+        if not future.cancel():
+            concurrent.futures.wait([future])
+
+
+class HashCache:
+    """
+    Digests of local files keyed by algorithm and (device, inode, mtime, size).
+
+    Persisted as JSON in the dataset directory; any write to a file changes its
+    mtime or size, so stale digests are never matched. A run that finishes
+    saves only the keys it looked up or added, so entries for replaced or
+    edited files do not accumulate.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.path = root / HASH_CACHE_FILENAME
+        self._entries: Dict[str, str] = {}
+        self._seen: set = set()
+        self._dirty = False
+        self._lock = threading.Lock()
+        try:
+            data = (orjson.loads if orjson is not None else json.loads)(
+                self.path.read_bytes()
+            )
+            if isinstance(data, dict):
+                self._entries = data
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable hash cache %s: %s", self.path, exc)
+
+    @staticmethod
+    def key(algorithm: str, st: os.stat_result) -> str:
+        return f"{algorithm}:{st.st_dev}:{st.st_ino}:{st.st_mtime_ns}:{st.st_size}"
+
+    def get(self, key: str) -> Optional[str]:
+        digest = self._entries.get(key)
+        if digest is not None:
+            with self._lock:
+                self._seen.add(key)
+        return digest
+
+    def put(self, key: str, digest: str) -> None:
+        with self._lock:
+            self._entries[key] = digest
+            self._seen.add(key)
+            self._dirty = True
+
+    def save(self, prune: bool = False) -> None:
+        """
+        Atomically rewrite the cache file if anything changed. With prune,
+        entries not used by this run are dropped; only pass it when the run
+        looked at every file, or the rest would simply be re-hashed next time.
+        """
+        with self._lock:
+            if prune and len(self._seen) < len(self._entries):
+                self._entries = {
+                    key: digest
+                    for key, digest in self._entries.items()
+                    if key in self._seen
+                }
+                self._dirty = True
+            if not self._dirty:
+                return
+            tmp_path = self.path.with_suffix(".json.tmp")
+            try:
+                if orjson is not None:
+                    tmp_path.write_bytes(orjson.dumps(self._entries))
+                else:
+                    tmp_path.write_text(json.dumps(self._entries), encoding="utf-8")
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as exc:
+                logger.warning("Failed to write hash cache %s: %s", self.path, exc)
+                tmp_path.unlink(missing_ok=True)
+
+
+class HashingWriter:
+    """
+    Write-through file wrapper that hashes every byte written. With xxh3=True
+    an xxh3_64 digest is kept alongside (requires xxhash); algorithm=None
+    keeps only that one.
+    """
+
+    def __init__(
+        self, fh: BinaryIO, algorithm: Optional[str] = "md5", xxh3: bool = False
+    ) -> None:
+        self.fh = fh
+        self.hasher = (
+            hashlib.new(algorithm, usedforsecurity=False) if algorithm else None
+        )
+        self.xxh3 = xxhash.xxh3_64() if xxh3 else None
+
+    def write(self, data: bytes) -> int:
+        if self.hasher is not None:
+            self.hasher.update(data)
+        if self.xxh3 is not None:
+            self.xxh3.update(data)
+        return self.fh.write(data)
+
+    def flush(self) -> None:
+        self.fh.flush()
+
+    def close(self) -> None:
+        self.fh.close()
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+    def xxh3_hexdigest(self) -> Optional[str]:
+        return self.xxh3.hexdigest() if self.xxh3 is not None else None
+
+
 class Downloader:
     """
     Downloads files defined in a YAML config.
@@ -98,6 +565,8 @@ class Downloader:
         verify_downloads: bool = True,
         use_progress: bool = True,
         console: Optional[Console] = None,
+        drive_chunk_size: int = DRIVE_CHUNK_SIZE,
+        fast_verify: bool = False,
     ) -> None:
         self.config_path = Path(config_path)
         self.api_key = api_key or os.environ.get("GOOGLE_API_KEY")
@@ -123,13 +592,29 @@ class Downloader:
                 "API key authentication is not supported by the Google Drive API client. "
                 "Provide OAuth2 credentials or a service account instead."
             )
-        self.session = requests.Session()
         self.max_http_workers = max(1, max_http_workers)
+        # One session shared by all HTTP workers: kept-alive connections (and
+        # their TLS sessions) are pooled per host and reused by whichever
+        # thread needs one next, instead of each thread handshaking on its own
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.max_http_workers,
+            pool_maxsize=self.max_http_workers,
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.max_drive_workers = max(1, max_drive_workers)
         self.manifest_only = manifest_only
         self.verify_only = verify_only
         self.verify_downloads = verify_downloads
-        self._session_local: threading.local = threading.local()
+        if fast_verify and xxhash is None:
+            logger.warning("xxhash is not installed; --fast-verify falls back to md5")
+            fast_verify = False
+        # Drive downloads record an xxh3 digest in the manifest, and verification
+        # prefers it over blake3/md5 (integrity checks only, not tamper-proof)
+        self.fast_verify = fast_verify
+        self.drive_chunk_size = max(256 * 1024, drive_chunk_size)
+        self._read_buffer_local: threading.local = threading.local()
         self.use_progress = use_progress
         self.console: Optional[Console] = console if use_progress else None
         credentials_path = Path(self.credentials_file)
@@ -142,14 +627,21 @@ class Downloader:
             )
         self._drive_credentials = None
         self._drive_local: threading.local = threading.local()
+        # Set when a run is aborted so in-flight Drive downloads stop between chunks
+        self._cancel = threading.Event()
+        self._drive_bucket = TokenBucket(
+            rate=DRIVE_REQUESTS_PER_SECOND, burst=DRIVE_REQUEST_BURST
+        )
 
     def _load_config(self, base_output_dir: Optional[Path]) -> SourceConfig:
         """Load and parse YAML config."""
-        if not self.config_path.exists():
-            raise FileNotFoundError(f"Config file not found: {self.config_path}")
+        try:
+            st = self.config_path.stat()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Config file not found: {self.config_path}") from None
 
-        with self.config_path.open("r", encoding="utf-8") as f:
-            data = yaml.safe_load(f)
+        # Shared cached object: read it, never mutate it
+        data = _read_yaml(str(self.config_path), st.st_mtime_ns, st.st_size)
 
         if not isinstance(data, dict):
             raise ValueError(f"Config must be a mapping at root: {self.config_path}")
@@ -188,6 +680,8 @@ class Downloader:
                         kind="http_file",
                         url=url,
                         filename=item.get("filename"),
+                        sha256=item.get("sha256"),
+                        md5=item.get("md5"),
                     )
                 )
             elif kind == "gdrive_folder":
@@ -317,12 +811,13 @@ class Downloader:
         for item in gdrive_items:
             self._download_gdrive_folder(item, target_root, overwrite)
 
-    def _get_http_session(self) -> requests.Session:
-        session = getattr(self._session_local, "session", None)
-        if session is None:
-            session = requests.Session()
-            self._session_local.session = session
-        return session
+    def _get_http_buffer(self) -> memoryview:
+        buffer = getattr(self._read_buffer_local, "buffer", None)
+        if buffer is None:
+            # One reusable read buffer per worker thread for response bodies
+            buffer = memoryview(bytearray(HTTP_COPY_BUFSIZE))
+            self._read_buffer_local.buffer = buffer
+        return buffer
 
     def _download_http_files(
         self, items: List[DownloadItem], target_root: Path, overwrite: bool
@@ -346,31 +841,33 @@ class Downloader:
         def worker(item: DownloadItem) -> None:
             self._download_http_file(item, target_root, overwrite)
 
-        executor = concurrent.futures.ThreadPoolExecutor(
+        with concurrent.futures.ThreadPoolExecutor(
             max_workers=self.max_http_workers
-        )
-        futures = [executor.submit(worker, item) for item in items]
-
-        if self.use_progress and len(futures) > 0:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[bold]HTTP[/]"),
-                BarColumn(),
-                MofNCompleteColumn(),
-                TimeElapsedColumn(),
-                TimeRemainingColumn(),
-                console=self.console,
-                refresh_per_second=8,
-            ) as progress:
-                task_id = progress.add_task("http_files", total=len(futures))
-                for future in concurrent.futures.as_completed(futures):
-                    future.result()
-                    progress.advance(task_id, 1)
-        else:
-            for future in concurrent.futures.as_completed(futures):
-                future.result()
+        ) as executor:
+            futures = [executor.submit(worker, item) for item in items]
 
-        executor.shutdown(wait=True)
+            try:
+                if self.use_progress and len(futures) > 0:
+                    with Progress(
+                        SpinnerColumn(),
+                        TextColumn("[bold]HTTP[/]"),
+                        BarColumn(),
+                        MofNCompleteColumn(),
+                        TimeElapsedColumn(),
+                        TimeRemainingColumn(),
+                        console=self.console,
+                        refresh_per_second=8,
+                    ) as progress:
+                        task_id = progress.add_task("http_files", total=len(futures))
+                        for future in concurrent.futures.as_completed(futures):
+                            future.result()
+                            progress.advance(task_id, 1)
+                else:
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
+            except BaseException:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
 
     def _download_http_file(
         self, item: DownloadItem, target_root: Path, overwrite: bool
@@ -396,22 +893,49 @@ class Downloader:
 
         logger.info("Downloading %s -> %s", item.url, dest_path)
 
-        session = self._get_http_session()
+        session = self.session
+        buffer = self._get_http_buffer()
+
+        # Hash the bytes as they stream in so verification needs no second read;
+        # SHA-256 is preferred when both are configured (hardware-accelerated in OpenSSL)
+        algorithm = None
+        expected_digest = None
+        if self.verify_downloads:
+            if item.sha256:
+                algorithm, expected_digest = "sha256", item.sha256.lower()
+            elif item.md5:
+                algorithm, expected_digest = "md5", item.md5.lower()
 
         try:
             dest_path.parent.mkdir(parents=True, exist_ok=True)
             with session.get(item.url, stream=True, timeout=60) as resp:
                 resp.raise_for_status()
 
-                tmp_path = dest_path.with_suffix(dest_path.suffix + ".part")
-                downloaded = 0
-                with tmp_path.open("wb") as f:
-                    for chunk in resp.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            downloaded += len(chunk)
+                with AtomicFile(dest_path, ".part") as out:
+                    f = out.fh
+                    _fadvise(f, "POSIX_FADV_SEQUENTIAL")
+                    sink = HashingWriter(f, algorithm) if algorithm else f
+                    write = sink.write
+                    # Read the body in 1 MiB pieces into this thread's buffer instead
+                    # of allocating a bytes object per 8 KB chunk; urllib3 still
+                    # undoes gzip etc.
+                    resp.raw.decode_content = True
+                    read_into = resp.raw.readinto
+                    while (n := read_into(buffer)) > 0:
+                        write(buffer[:n])
+                    downloaded = f.tell()
+                    # Bytes were hashed in flight and are never re-read here;
+                    # start writeback and let the kernel drop them from page cache
+                    f.flush()
+                    _fadvise(f, "POSIX_FADV_DONTNEED")
+
+                    if algorithm and sink.hexdigest() != expected_digest:
+                        raise RuntimeError(
+                            f"Checksum mismatch for {item.url} "
+                            f"(expected {algorithm}={expected_digest}, got {sink.hexdigest()})"
+                        )
 
-                tmp_path.rename(dest_path)
+                    out.commit()
                 size_str = (
                     f"{downloaded / 1_048_576:.2f} MB" if downloaded else "unknown size"
                 )
@@ -427,7 +951,8 @@ class Downloader:
         if not item.folder_id:
             raise ValueError("gdrive_folder item missing folder_id")
 
-        drive_service = self._get_drive_service()
+        # Authenticate up front (the OAuth flow may prompt) before worker threads start
+        self._get_drive_service()
 
         logger.info(
             "Downloading Google Drive folder %s (recursive=%s) using Google Drive API",
@@ -435,21 +960,91 @@ class Downloader:
             item.recursive,
         )
 
-        # Stream listing and downloads concurrently; write manifest at the end
-        manifest: List[Dict[str, Any]] = []
-        futures: List[concurrent.futures.Future] = []
+        # Stream listing and downloads concurrently. Manifest entries are
+        # appended to a JSONL file as they are enumerated rather than held in
+        # memory; it is published (and .manifest.json derived) once listing ends
+        target_root.mkdir(parents=True, exist_ok=True)
+        manifest_part = target_root / ".manifest.jsonl.part"
+        manifest_count = 0
         scheduled_count = 0
-        # Dedupe controls: skip scheduling identical path+md5; track conflicts where same path has different md5
-        seen_md5_by_path: Dict[str, set] = {}
+        # Dedupe controls: skip scheduling identical path+md5; track conflicts where same path has different md5.
+        # First md5 seen per path; a set is only allocated once a path conflicts
+        seen: set = set()
+        first_md5: Dict[str, str] = {}
         skipped_duplicate_count = 0
         conflict_md5s_by_path: Dict[str, set] = {}
-
-        executor = concurrent.futures.ThreadPoolExecutor(
-            max_workers=self.max_drive_workers
+        schedule_downloads = not self.manifest_only and not self.verify_only
+        # Sizes of files already on disk, gathered in one walk instead of a
+        # stat per listed file; only needed when existing files may be kept
+        local_sizes: Dict[str, int] = (
+            self._index_local_files(target_root)
+            if schedule_downloads and not overwrite
+            else {}
         )
-
-        def submit_download(file_meta: Dict[str, Any], dest_path: Path) -> None:
-            nonlocal scheduled_count
+        # With fast verify, xxh3 digests from the previous manifest carry over
+        # to entries whose file is unchanged on Drive (same id and md5); files
+        # downloaded in this run get theirs from hashing in flight
+        xxh3_by_id: Dict[str, str] = {}
+        previous_xxh3: Dict[Tuple[str, Optional[str]], str] = (
+            self._load_manifest_xxh3(target_root) if self.fast_verify else {}
+        )
+        downloading: Dict[concurrent.futures.Future, str] = {}
+
+        # Finished downloads are handed back through a queue so progress and
+        # failures surface while the listing is still paginating. Checks of
+        # files already on disk come back the same way and are tracked in
+        # `verifying` so a failed check can schedule the download.
+        completed: "queue.Queue[concurrent.futures.Future]" = queue.Queue()
+        pending = 0
+        failures: List[concurrent.futures.Future] = []
+        verifying: Dict[concurrent.futures.Future, Tuple[Dict[str, Any], str]] = {}
+        verify_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        progress: Optional[Progress] = None
+        listing_task = None
+        downloads_task = None
+
+        def drain(block: bool) -> None:
+            nonlocal pending
+            while pending:
+                try:
+                    future = completed.get(block=block)
+                except queue.Empty:
+                    return
+                pending -= 1
+                redo = verifying.pop(future, None)
+                if redo is not None:
+                    # Unreadable or mismatched local copies are downloaded again
+                    if future.exception() is not None or not future.result():
+                        submit(*redo)
+                    continue
+                file_id = downloading.pop(future, None)
+                if future.exception() is not None:
+                    failures.append(future)
+                else:
+                    if file_id is not None and future.result() is not None:
+                        xxh3_by_id[file_id] = future.result()
+                    if downloads_task is not None:
+                        progress.advance(downloads_task, 1)
+                if block and failures:
+                    failures[0].result()
+
+        def is_new(rel_path_str: str, expected_md5: Optional[str]) -> bool:
+            """Record path+md5; False for an identical duplicate already scheduled."""
+            nonlocal skipped_duplicate_count
+            if not expected_md5:
+                return True
+            key = (rel_path_str, expected_md5)
+            if key in seen:
+                skipped_duplicate_count += 1
+                return False
+            seen.add(key)
+            prev = first_md5.setdefault(rel_path_str, expected_md5)
+            if prev != expected_md5:
+                conflict_md5s_by_path.setdefault(rel_path_str, {prev}).add(expected_md5)
+            return True
+
+        def submit(file_meta: Dict[str, Any], dest_path: str) -> None:
+            nonlocal pending, scheduled_count
             future = executor.submit(
                 self._download_gdrive_file,
                 file_meta["id"],
@@ -458,78 +1053,138 @@ class Downloader:
                 file_meta.get("md5Checksum"),
                 file_meta.get("size"),
             )
-            futures.append(future)
+            if self.fast_verify:
+                downloading[future] = file_meta["id"]
+            future.add_done_callback(completed.put)
+            pending += 1
             scheduled_count += 1
-            if self.use_progress and downloads_task is not None:
+            if downloads_task is not None:
                 progress.update(downloads_task, total=scheduled_count)
 
-        generator = self._walk_folder(
-            drive_service, item.folder_id, target_root, item.recursive
+        def schedule_all(
+            file_meta: Dict[str, Any], dest_path: str, rel_path_str: str
+        ) -> None:
+            if is_new(rel_path_str, file_meta.get("md5Checksum")):
+                submit(file_meta, dest_path)
+                drain(block=False)
+
+        def schedule_missing(
+            file_meta: Dict[str, Any], dest_path: str, rel_path_str: str
+        ) -> None:
+            nonlocal pending
+            expected_md5 = file_meta.get("md5Checksum")
+            if not is_new(rel_path_str, expected_md5):
+                return
+            local_size = local_sizes.get(rel_path_str)
+            if local_size is None:
+                submit(file_meta, dest_path)
+            elif self.verify_downloads:
+                # Hash the existing copy on the verification pool, so listing
+                # never waits on disk reads and files are checked in parallel
+                future = verify_executor.submit(
+                    self._verify_local_file,
+                    Path(dest_path),
+                    file_meta.get("size"),
+                    expected_md5,
+                    local_size,
+                    hash_cache,
+                )
+                verifying[future] = (file_meta, dest_path)
+                future.add_done_callback(completed.put)
+                pending += 1
+            drain(block=False)
+
+        # Digests of files already on disk are cached across runs; only needed
+        # when existing files are hashed (verify-only, or kept unless corrupt)
+        hashes_local_files = self.verify_only or (schedule_downloads and not overwrite)
+        hash_cache = (
+            HashCache(target_root)
+            if self.verify_downloads and hashes_local_files
+            else None
         )
 
-        if self.use_progress:
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[bold]Listing[/]"),
-                BarColumn(),
-                MofNCompleteColumn(),
-                TimeElapsedColumn(),
-                SpinnerColumn(),
-                TextColumn("[bold]Downloads[/]"),
-                BarColumn(),
-                MofNCompleteColumn(),
-                TimeElapsedColumn(),
-                TimeRemainingColumn(),
-                console=self.console,
-                refresh_per_second=8,
-            ) as progress:
+        # Pick the per-file scheduling step once: listing-only modes schedule
+        # nothing, and with overwrite no file on disk needs to be looked at
+        schedule: Optional[Callable[[Dict[str, Any], str, str], None]]
+        if not schedule_downloads:
+            schedule = None
+        elif overwrite:
+            schedule = schedule_all
+        else:
+            schedule = schedule_missing
+
+        generator = self._walk_folder(item.folder_id, target_root, item.recursive)
+
+        with contextlib.ExitStack() as stack:
+            if hash_cache is not None:
+                # Registered first so it runs last, after in-flight work finishes
+                # Prune only when the folder completed, so an aborted run
+                # keeps digests of the files it never reached
+                stack.push(
+                    lambda exc_type, exc, tb: hash_cache.save(prune=exc_type is None)
+                )
+            if self.use_progress:
+                progress = stack.enter_context(
+                    Progress(
+                        SpinnerColumn(),
+                        TextColumn("[bold]Listing[/]"),
+                        BarColumn(),
+                        MofNCompleteColumn(),
+                        TimeElapsedColumn(),
+                        SpinnerColumn(),
+                        TextColumn("[bold]Downloads[/]"),
+                        BarColumn(),
+                        MofNCompleteColumn(),
+                        TimeElapsedColumn(),
+                        TimeRemainingColumn(),
+                        console=self.console,
+                        refresh_per_second=8,
+                    )
+                )
                 listing_task = progress.add_task("drive_listing", total=None)
                 downloads_task = (
                     progress.add_task("drive_files", total=0)
-                    if not self.manifest_only and not self.verify_only
+                    if schedule_downloads
                     else None
                 )
-
-                for file_meta, dest_path in generator:
-                    # Build manifest entry
-                    manifest.append(
-                        {
-                            "id": file_meta["id"],
-                            "path": str(dest_path.relative_to(target_root)),
-                            "md5": file_meta.get("md5Checksum"),
-                            "size": file_meta.get("size"),
-                        }
+            manifest_fh = stack.enter_context(manifest_part.open("wb"))
+            write_manifest_line = manifest_fh.write
+            executor = stack.enter_context(
+                concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_drive_workers
+                )
+            )
+            if schedule is schedule_missing and self.verify_downloads:
+                verify_executor = stack.enter_context(
+                    concurrent.futures.ThreadPoolExecutor(
+                        max_workers=os.cpu_count() or 1
                     )
-                    progress.advance(listing_task, 1)
-
-                    if self.manifest_only or self.verify_only:
-                        continue
+                )
 
-                    # Decide whether to schedule
-                    expected_size = file_meta.get("size")
-                    expected_md5 = file_meta.get("md5Checksum")
-                    rel_path_str = str(dest_path.relative_to(target_root))
-                    if expected_md5:
-                        existing = seen_md5_by_path.get(rel_path_str)
-                        if existing is None:
-                            seen_md5_by_path[rel_path_str] = {expected_md5}
-                        else:
-                            if expected_md5 in existing:
-                                skipped_duplicate_count += 1
-                                # Identical path+md5 duplicate: skip scheduling
-                                continue
-                            else:
-                                existing.add(expected_md5)
-                                conflict_md5s_by_path[rel_path_str] = set(existing)
-                    if dest_path.exists() and not overwrite:
-                        if self.verify_downloads and self._verify_local_file(
-                            dest_path, expected_size, expected_md5
-                        ):
-                            continue
-                        elif not self.verify_downloads:
-                            continue
-
-                    submit_download(file_meta, dest_path)
+            try:
+                last_log = time.time()
+                for file_meta, dest_path, rel_path_str in generator:
+                    # Record manifest entry
+                    entry = {
+                        "id": file_meta["id"],
+                        "path": rel_path_str,
+                        "md5": file_meta.get("md5Checksum"),
+                        "size": file_meta.get("size"),
+                    }
+                    if previous_xxh3:
+                        xxh3 = previous_xxh3.get((entry["id"], entry["md5"]))
+                        if xxh3 is not None:
+                            entry["xxh3"] = xxh3
+                    write_manifest_line(_manifest_line(entry))
+                    manifest_count += 1
+                    if progress is not None:
+                        progress.advance(listing_task, 1)
+                    elif time.time() - last_log >= 5:
+                        logger.info("Enumerated %d file(s) so far...", manifest_count)
+                        last_log = time.time()
+
+                    if schedule is not None:
+                        schedule(file_meta, dest_path, rel_path_str)
 
                 # After listing completes
                 if skipped_duplicate_count:
@@ -545,161 +1200,190 @@ class Downloader:
                         ", ".join(sample),
                         "..." if len(conflict_md5s_by_path) > len(sample) else "",
                     )
-                self._write_manifest(target_root, manifest)
+                manifest_fh.close()
+                manifest_path = self._write_manifest(
+                    target_root, manifest_part, manifest_count
+                )
                 if self.manifest_only:
-                    executor.shutdown(wait=False)
                     return
                 if self.verify_only:
-                    self._verify_against_manifest(target_root, manifest)
-                    executor.shutdown(wait=False)
+                    self._verify_against_manifest(
+                        target_root,
+                        _iter_manifest_lines(manifest_path) if manifest_path else [],
+                        hash_cache,
+                    )
                     return
 
                 # Wait for all downloads to complete
-                for future in concurrent.futures.as_completed(futures):
-                    future.result()
-                    if downloads_task is not None:
-                        progress.advance(downloads_task, 1)
-        else:
-            last_log = time.time()
-            for file_meta, dest_path in generator:
-                manifest.append(
-                    {
-                        "id": file_meta["id"],
-                        "path": str(dest_path.relative_to(target_root)),
-                        "md5": file_meta.get("md5Checksum"),
-                        "size": file_meta.get("size"),
-                    }
-                )
-                if time.time() - last_log >= 5:
-                    logger.info("Enumerated %d file(s) so far...", len(manifest))
-                    last_log = time.time()
-
-                if not self.manifest_only and not self.verify_only:
-                    expected_size = file_meta.get("size")
-                    expected_md5 = file_meta.get("md5Checksum")
-                    rel_path_str = str(dest_path.relative_to(target_root))
-                    if expected_md5:
-                        existing = seen_md5_by_path.get(rel_path_str)
-                        if existing is None:
-                            seen_md5_by_path[rel_path_str] = {expected_md5}
-                        else:
-                            if expected_md5 in existing:
-                                skipped_duplicate_count += 1
-                                # Identical path+md5 duplicate: skip scheduling
-                                continue
-                            else:
-                                existing.add(expected_md5)
-                                conflict_md5s_by_path[rel_path_str] = set(existing)
-                    if dest_path.exists() and not overwrite:
-                        if self.verify_downloads and self._verify_local_file(
-                            dest_path, expected_size, expected_md5
-                        ):
-                            continue
-                        elif not self.verify_downloads:
-                            continue
-                    submit_download(file_meta, dest_path)
-
-            self._write_manifest(target_root, manifest)
-            if skipped_duplicate_count:
-                logger.info(
-                    "Deduped %d download(s) by identical path+md5",
-                    skipped_duplicate_count,
-                )
-            if conflict_md5s_by_path:
-                sample = list(conflict_md5s_by_path.keys())[:10]
-                logger.warning(
-                    "Detected %d path(s) with multiple different md5 values (possible naming conflicts). Example(s): %s%s",
-                    len(conflict_md5s_by_path),
-                    ", ".join(sample),
-                    "..." if len(conflict_md5s_by_path) > len(sample) else "",
-                )
-            if self.manifest_only:
-                executor.shutdown(wait=False)
-                return
-            if self.verify_only:
-                self._verify_against_manifest(target_root, manifest)
-                executor.shutdown(wait=False)
-                return
-
-            for future in concurrent.futures.as_completed(futures):
-                future.result()
-
-        executor.shutdown(wait=True)
+                if failures:
+                    failures[0].result()
+                drain(block=True)
+                if xxh3_by_id and manifest_path is not None:
+                    self._add_manifest_xxh3(target_root, manifest_path, xxh3_by_id)
+            except BaseException:
+                # Drop queued downloads and tell running ones to stop; leaving the
+                # executor context then only waits for in-flight chunks
+                self._cancel.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                if verify_executor is not None:
+                    verify_executor.shutdown(wait=False, cancel_futures=True)
+                manifest_fh.close()
+                manifest_part.unlink(missing_ok=True)
+                raise
 
     def _walk_folder(
         self,
-        drive_service: Any,
         folder_id: str,
         local_root: Path,
         recursive: bool = True,
         page_size: int = 1000,
-    ) -> Iterable[Tuple[Dict[str, Any], Path]]:
+    ) -> Iterable[Tuple[Dict[str, Any], str, str]]:
         """
         Walk a Google Drive folder recursively using the Drive API,
-        yielding (file_metadata, local_path) tuples.
+        yielding (file_metadata, local_path, path_relative_to_local_root) tuples.
+        Paths are plain strings; callers build a Path only for files they act on.
+
+        Pages for sibling folders (and each folder's next page) are fetched
+        concurrently, so enumeration costs roughly depth x round-trip rather
+        than one round-trip per folder page. Yield order is not deterministic.
+        Subfolders and files are listed by separate queries, so folder pages
+        carry only id/name and non-recursive walks never list subfolders.
         """
-        stack = [(folder_id, local_root)]
-
-        while stack:
-            current_folder_id, current_local = stack.pop()
-            page_token: Optional[str] = None
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_drive_workers
+        ) as executor:
+            # The relative path is carried alongside each folder and extended
+            # per entry, so nothing re-derives it with Path.relative_to
+            in_flight: Dict[
+                concurrent.futures.Future, Tuple[str, str, str, bool]
+            ] = {}
+
+            def submit(
+                current_folder_id: str,
+                current_local: str,
+                current_rel: str,
+                folders: bool,
+                page_token: Optional[str] = None,
+            ) -> None:
+                future = executor.submit(
+                    self._list_page, current_folder_id, page_token, page_size, folders
+                )
+                in_flight[future] = (current_folder_id, current_local, current_rel, folders)
+
+            def submit_folder(
+                current_folder_id: str, current_local: str, current_rel: str
+            ) -> None:
+                submit(current_folder_id, current_local, current_rel, folders=False)
+                if recursive:
+                    submit(current_folder_id, current_local, current_rel, folders=True)
+
+            join = os.path.join
+            submit_folder(folder_id, os.fspath(local_root), "")
+            while in_flight:
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    current_folder_id, current_local, current_rel, folders = in_flight.pop(
+                        future
+                    )
+                    response = future.result()
 
-            while True:
-                query = f"'{current_folder_id}' in parents and trashed = false"
-                try:
-                    response = (
-                        drive_service.files()
-                        .list(
-                            q=query,
-                            spaces="drive",
-                            fields="nextPageToken, files(id,name,mimeType,md5Checksum,size)",
-                            pageToken=page_token,
-                            pageSize=page_size,
-                            supportsAllDrives=True,
-                            includeItemsFromAllDrives=True,
+                    page_token = response.get("nextPageToken")
+                    if page_token:
+                        submit(
+                            current_folder_id, current_local, current_rel, folders, page_token
                         )
-                        .execute()
-                    )
-                except HttpError as exc:
-                    logger.error("Failed to list folder %s: %s", current_folder_id, exc)
-                    raise
-
-                for file_item in response.get("files", []):
-                    mime_type = file_item.get("mimeType")
-                    name = file_item.get("name") or file_item["id"]
-
-                    if mime_type == "application/vnd.google-apps.folder" and recursive:
-                        next_local = current_local / name
-                        stack.append((file_item["id"], next_local))
-                    elif mime_type != "application/vnd.google-apps.folder":
+
+                    if folders:
+                        for folder_item in response.get("files", []):
+                            name = folder_item.get("name") or folder_item["id"]
+                            submit_folder(
+                                folder_item["id"],
+                                join(current_local, name),
+                                join(current_rel, name) if current_rel else name,
+                            )
+                        continue
+
+                    for file_item in response.get("files", []):
+                        name = file_item.get("name") or file_item["id"]
                         metadata = {
                             "id": file_item["id"],
                             "name": name,
-                            "mimeType": mime_type,
+                            "mimeType": file_item.get("mimeType"),
                             "md5Checksum": file_item.get("md5Checksum"),
                             "size": int(file_item["size"])
                             if file_item.get("size")
                             else None,
                         }
-                        yield metadata, current_local / name
+                        yield (
+                            metadata,
+                            join(current_local, name),
+                            join(current_rel, name) if current_rel else name,
+                        )
 
-                page_token = response.get("nextPageToken")
-                if not page_token:
-                    break
+    def _list_page(
+        self,
+        folder_id: str,
+        page_token: Optional[str],
+        page_size: int,
+        folders: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Fetch one page of a folder's subfolders (folders=True) or files
+        (runs on listing worker threads).
+        """
+        if folders:
+            query = (
+                f"'{folder_id}' in parents and trashed = false"
+                f" and mimeType = '{DRIVE_FOLDER_MIME_TYPE}'"
+            )
+            fields = "nextPageToken, files(id,name)"
+        else:
+            query = (
+                f"'{folder_id}' in parents and trashed = false"
+                f" and mimeType != '{DRIVE_FOLDER_MIME_TYPE}'"
+            )
+            fields = "nextPageToken, files(id,name,mimeType,md5Checksum,size)"
+        request = (
+            self._get_drive_service()
+            .files()
+            .list(
+                q=query,
+                spaces="drive",
+                fields=fields,
+                pageToken=page_token,
+                pageSize=page_size,
+                supportsAllDrives=True,
+                includeItemsFromAllDrives=True,
+            )
+        )
+
+        def execute() -> Dict[str, Any]:
+            self._drive_bucket.acquire()
+            return request.execute()
+
+        try:
+            return _drive_retry(execute)
+        except HttpError as exc:
+            logger.error("Failed to list folder %s: %s", folder_id, exc)
+            raise
 
     def _download_gdrive_file(
         self,
         file_id: str,
         name: str,
-        dest_path: Path,
+        dest_path: Union[str, Path],
         expected_md5: Optional[str],
         expected_size: Optional[int],
-    ) -> None:
-        """Download a single file from Google Drive using the Drive API."""
+    ) -> Optional[str]:
+        """
+        Download a single file from Google Drive using the Drive API. Returns
+        the file's xxh3 hex digest when fast verify is enabled, else None.
+        """
+        dest_path = Path(dest_path)
         logger.info("Downloading Drive file %s (%s) -> %s", file_id, name, dest_path)
         dest_path.parent.mkdir(parents=True, exist_ok=True)
-        # Use a unique temp file per Drive file to avoid races when multiple entries map to the same destination
-        tmp_path = dest_path.with_suffix(dest_path.suffix + f".part.{file_id}")
 
         try:
             drive_service = self._get_drive_service()
@@ -707,12 +1391,36 @@ class Downloader:
                 fileId=file_id, supportsAllDrives=True
             )
 
-            with io.FileIO(tmp_path, "wb") as fh:
-                downloader = MediaIoBaseDownload(fh, request)
+            # Hash bytes on their way to disk so verification is a digest
+            # comparison rather than a second read of the file
+            # A unique temp suffix per Drive file avoids races when multiple
+            # entries map to the same destination (named fallback only)
+            with AtomicFile(dest_path, f".part.{file_id}") as out:
+                fh = out.fh
+                _fadvise(fh, "POSIX_FADV_SEQUENTIAL")
+                # md5 only when it will be compared against Drive's checksum
+                check_md5 = bool(self.verify_downloads and expected_md5)
+                writer = (
+                    HashingWriter(fh, "md5" if check_md5 else None, xxh3=self.fast_verify)
+                    if self.fast_verify or check_md5
+                    else fh
+                )
+                downloader = MediaIoBaseDownload(
+                    writer, request, chunksize=self.drive_chunk_size
+                )
+
+                def next_chunk():
+                    self._drive_bucket.acquire()
+                    return downloader.next_chunk()
+
                 done = False
                 while not done:
+                    if self._cancel.is_set():
+                        raise RuntimeError("Download cancelled")
                     try:
-                        status, done = downloader.next_chunk()
+                        # The downloader keeps its byte offset, so a retried
+                        # chunk resumes where the failed request left off
+                        status, done = _drive_retry(next_chunk)
                         if status:
                             logger.debug(
                                 "Drive download %s: %.2f%% complete",
@@ -727,63 +1435,218 @@ class Downloader:
                             exc,
                         )
                         raise
+                written = fh.tell()
+                fh.flush()
+                _fadvise(fh, "POSIX_FADV_DONTNEED")
+
+                if self.verify_downloads and (
+                    (expected_size is not None and written != expected_size)
+                    or (expected_md5 and writer.hexdigest() != expected_md5)
+                ):
+                    raise RuntimeError(
+                        f"Verification failed for {dest_path} (expected size={expected_size}, md5={expected_md5})"
+                    )
 
-            tmp_path.replace(dest_path)
-
-            if self.verify_downloads and not self._verify_local_file(
-                dest_path, expected_size, expected_md5
-            ):
-                raise RuntimeError(
-                    f"Verification failed for {dest_path} (expected size={expected_size}, md5={expected_md5})"
-                )
+                out.commit()
 
             logger.info("Saved %s", dest_path)
+            return writer.xxh3_hexdigest() if self.fast_verify else None
         except Exception as e:
+            # AtomicFile discards its temp file; dest_path is only ever replaced
+            # on commit, so an existing copy survives a failed re-download
             logger.error("Failed to download %s: %s", name, e)
-            if tmp_path.exists():
-                tmp_path.unlink(missing_ok=True)
-            if dest_path.exists():
-                dest_path.unlink()
             raise
 
     def _write_manifest(
-        self, target_root: Path, manifest: List[Dict[str, Any]]
-    ) -> None:
-        if not manifest:
-            return
+        self, target_root: Path, manifest_part: Path, count: int
+    ) -> Optional[Path]:
+        """
+        Publish the enumerated JSONL manifest as .manifest.jsonl and derive the
+        .manifest.json array from it line by line. Returns the JSONL path, or
+        None when there were no entries.
+        """
+        if not count:
+            manifest_part.unlink(missing_ok=True)
+            return None
 
+        jsonl_path = target_root / ".manifest.jsonl"
         manifest_path = target_root / ".manifest.json"
         try:
-            manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-            logger.info(
-                "Wrote manifest with %d entries to %s", len(manifest), manifest_path
-            )
+            manifest_part.replace(jsonl_path)
+            # Each JSONL line is already a JSON object, so the array is built
+            # by splicing lines together without re-parsing them
+            with jsonl_path.open("rb") as src, manifest_path.open("wb") as dst:
+                separator = b"[\n"
+                for line in src:
+                    dst.write(separator)
+                    dst.write(line.rstrip(b"\n"))
+                    separator = b",\n"
+                dst.write(b"\n]\n")
+            logger.info("Wrote manifest with %d entries to %s", count, manifest_path)
         except Exception as exc:
             logger.warning("Failed to write manifest %s: %s", manifest_path, exc)
+        return jsonl_path if jsonl_path.exists() else None
+
+    @staticmethod
+    def _load_manifest_xxh3(
+        target_root: Path,
+    ) -> Dict[Tuple[str, Optional[str]], str]:
+        """Map (id, md5) -> xxh3 for entries of an existing .manifest.jsonl."""
+        jsonl_path = target_root / ".manifest.jsonl"
+        digests: Dict[Tuple[str, Optional[str]], str] = {}
+        try:
+            for entry in _iter_manifest_lines(jsonl_path):
+                if entry.get("xxh3") and entry.get("id"):
+                    digests[(entry["id"], entry.get("md5"))] = entry["xxh3"]
+        except FileNotFoundError:
+            pass
+        except ValueError as exc:
+            logger.warning("Ignoring xxh3 digests from %s: %s", jsonl_path, exc)
+        return digests
+
+    def _add_manifest_xxh3(
+        self, target_root: Path, jsonl_path: Path, xxh3_by_id: Dict[str, str]
+    ) -> None:
+        """Rewrite the published manifest with xxh3 digests of this run's downloads."""
+        manifest_part = target_root / ".manifest.jsonl.part"
+        count = 0
+        with manifest_part.open("wb") as dst:
+            for entry in _iter_manifest_lines(jsonl_path):
+                xxh3 = xxh3_by_id.get(entry.get("id"))
+                if xxh3 is not None:
+                    entry["xxh3"] = xxh3
+                dst.write(_manifest_line(entry))
+                count += 1
+        self._write_manifest(target_root, manifest_part, count)
 
     def _verify_against_manifest(
-        self, target_root: Path, manifest: List[Dict[str, Any]]
+        self,
+        target_root: Path,
+        manifest: Iterable[Dict[str, Any]],
+        hash_cache: Optional[HashCache] = None,
     ) -> None:
-        missing = []
-        for entry in manifest:
-            expected_path = target_root / entry["path"]
-            if not self._verify_local_file(
-                expected_path,
-                int(entry["size"]) if entry.get("size") else None,
-                entry.get("md5"),
-            ):
-                missing.append(entry["path"])
+        # Pass 1 (cheap): existence and size for every entry from one scandir
+        # walk. Only files that pass and have a digest go on to be hashed;
+        # xxh3 (with fast verify) is preferred, then blake3 when the blake3
+        # module is present, then md5.
+        local_sizes = self._index_local_files(target_root)
+        missing: List[str] = []
+        checked = 0
+        # Manifests built from Drive listings often repeat identical path+digest
+        # entries; each distinct pair is hashed once
+        queued: set = set()
+
+        def to_hash() -> Iterator[Tuple[str, str, bytes, int]]:
+            nonlocal checked
+            for entry in manifest:
+                checked += 1
+                rel_path = entry["path"]
+                local_size = local_sizes.get(rel_path)
+                if local_size is None:
+                    missing.append(rel_path)
+                    continue
+                if entry.get("size") and local_size != int(entry["size"]):
+                    logger.warning("Size mismatch for %s", target_root / rel_path)
+                    missing.append(rel_path)
+                    continue
+                if not self.verify_downloads:
+                    continue
+                if self.fast_verify and entry.get("xxh3"):
+                    algorithm = "xxh3"
+                elif blake3 is not None and entry.get("blake3"):
+                    algorithm = "blake3"
+                elif entry.get("md5"):
+                    algorithm = "md5"
+                else:
+                    continue
+                # Compare raw digests; the manifest's hex is decoded once here
+                try:
+                    expected = bytes.fromhex(entry[algorithm])
+                except ValueError:
+                    logger.warning("Invalid %s in manifest for %s", algorithm, rel_path)
+                    missing.append(rel_path)
+                    continue
+                key = (rel_path, expected)
+                if key in queued:
+                    continue
+                queued.add(key)
+                yield rel_path, algorithm, expected, local_size
+
+        # Pass 2: hash the survivors, largest first, so the biggest file is never
+        # the one left hashing alone at the end while other workers sit idle.
+        # The candidate tuples are small; the size index is already O(files).
+        candidates = sorted(to_hash(), key=operator.itemgetter(3), reverse=True)
+
+        # Hardlinked entries share an inode: each (device, inode) is hashed
+        # once and every entry pointing at it is checked against that digest
+        groups: Dict[Tuple[int, int, str], List[Tuple[str, bytes]]] = {}
+        work: List[Tuple[Tuple[int, int, str], str, str, int, os.stat_result]] = []
+        for rel_path, algorithm, expected, size in candidates:
+            try:
+                st = os.stat(target_root / rel_path)
+            except OSError:
+                missing.append(rel_path)
+                continue
+            key = (st.st_dev, st.st_ino, algorithm)
+            members = groups.get(key)
+            if members is None:
+                groups[key] = members = []
+                work.append((key, rel_path, algorithm, size, st))
+            members.append((rel_path, expected))
+        del candidates
+
+        def digest_of(
+            rel_path: str, algorithm: str, size: int, st: os.stat_result
+        ) -> Optional[bytes]:
+            try:
+                return self._local_digest(
+                    target_root / rel_path, algorithm, size, hash_cache, st
+                )
+            except OSError:
+                return None
+
+        def settle(key: Tuple[int, int, str], digest: Optional[bytes]) -> None:
+            for rel_path, expected in groups.pop(key):
+                if digest != expected:
+                    missing.append(rel_path)
+
+        if len(work) < VERIFY_PARALLEL_MIN:
+            for key, *args in work:
+                settle(key, digest_of(*args))
+        else:
+            # Hashing releases the GIL, so threads spread digest work across
+            # cores. Submission is windowed to bound the number of live futures.
+            workers = os.cpu_count() or 1
+            in_flight: Dict[concurrent.futures.Future, Tuple[int, int, str]] = {}
+
+            def collect(done: Iterable[concurrent.futures.Future]) -> None:
+                for future in done:
+                    settle(in_flight.pop(future), future.result())
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+                for key, *args in work:
+                    in_flight[executor.submit(digest_of, *args)] = key
+                    if len(in_flight) >= workers * 4:
+                        done, _ = concurrent.futures.wait(
+                            in_flight, return_when=concurrent.futures.FIRST_COMPLETED
+                        )
+                        collect(done)
+                collect(list(in_flight))
         if missing:
-            logger.error(
-                "Verification failed. %d file(s) missing or corrupt: %s",
-                len(missing),
-                ", ".join(missing[:10]) + ("..." if len(missing) > 10 else ""),
-            )
+            # Only the first few (sorted) paths are shown; skip building even
+            # that summary when errors are not being logged
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(
+                    "Verification failed. %d file(s) missing or corrupt: %s%s",
+                    len(missing),
+                    ", ".join(heapq.nsmallest(10, missing)),
+                    "..." if len(missing) > 10 else "",
+                )
             raise RuntimeError("Verification failed - see log for details")
 
         logger.info(
             "Verification succeeded for %d file(s) in %s",
-            len(manifest),
+            checked,
             target_root,
         )
 
@@ -792,23 +1655,117 @@ class Downloader:
         path: Path,
         expected_size: Optional[int],
         expected_md5: Optional[str],
+        local_size: Optional[int] = None,
+        hash_cache: Optional[HashCache] = None,
     ) -> bool:
-        if not path.exists():
-            return False
+        """Check a local file; pass local_size when it is already known to skip the stat."""
+        if local_size is None:
+            try:
+                local_size = path.stat().st_size
+            except FileNotFoundError:
+                return False
 
-        if expected_size is not None and path.stat().st_size != expected_size:
+        if expected_size is not None and local_size != expected_size:
             logger.warning("Size mismatch for %s", path)
             return False
 
         if self.verify_downloads and expected_md5:
-            return self._calculate_md5(path) == expected_md5
+            try:
+                expected = bytes.fromhex(expected_md5)
+            except ValueError:
+                return False
+            return self._local_digest(path, "md5", local_size, hash_cache) == expected
 
         return True
 
+    def _local_digest(
+        self,
+        path: Path,
+        algorithm: str,
+        size: int,
+        hash_cache: Optional[HashCache] = None,
+        st: Optional[os.stat_result] = None,
+    ) -> bytes:
+        """
+        Raw digest of a local file, served from hash_cache when the file is
+        unchanged. Pass st when the file was just stat'ed to skip another stat.
+        """
+        key = None
+        if hash_cache is not None:
+            key = HashCache.key(algorithm, st if st is not None else path.stat())
+            cached = hash_cache.get(key)
+            if cached is not None:
+                return bytes.fromhex(cached)
+        if algorithm == "blake3":
+            digest = self._digest_blake3(path, size)
+        elif algorithm == "xxh3":
+            digest = self._digest_mapped(path, xxhash.xxh3_64())
+        else:
+            # usedforsecurity=False keeps MD5 usable on FIPS-restricted OpenSSL
+            digest = self._digest_mapped(path, hashlib.md5(usedforsecurity=False))
+        if key is not None:
+            hash_cache.put(key, digest.hex())
+        return digest
+
+    @staticmethod
+    def _index_local_files(root: Path) -> Dict[str, int]:
+        """Map each file under root (path relative to root -> size) in one scandir walk."""
+        index: Dict[str, int] = {}
+        stack = [(str(root), "")]
+        while stack:
+            dir_path, rel_dir = stack.pop()
+            try:
+                with os.scandir(dir_path) as it:
+                    for entry in it:
+                        rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                        # Symlinked directories are not followed, so a link
+                        # loop under the root cannot recurse forever
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, rel_path))
+                        elif entry.is_file():
+                            index[rel_path] = entry.stat().st_size
+            except OSError as exc:
+                # A vanished or unreadable directory only loses its own files
+                if not isinstance(exc, FileNotFoundError):
+                    logger.warning("Cannot index %s: %s", dir_path, exc)
+                continue
+        return index
+
     @staticmethod
-    def _calculate_md5(path: Path, chunk_size: int = 1_048_576) -> str:
-        digest = hashlib.md5()
+    def _digest_blake3(path: Path, size: int) -> bytes:
         with path.open("rb") as handle:
-            for chunk in iter(lambda: handle.read(chunk_size), b""):
-                digest.update(chunk)
-        return digest.hexdigest()
+            if size >= BLAKE3_MMAP_MIN_SIZE:
+                # Hash the whole mapped file at once so BLAKE3 can split it across cores
+                digest = blake3(max_threads=blake3.AUTO).update_mmap(path).digest()
+            else:
+                digest = hashlib.file_digest(handle, blake3).digest()
+            _fadvise(handle, "POSIX_FADV_DONTNEED")
+            return digest
+
+    @staticmethod
+    def _digest_mapped(path: Path, digest: Any) -> bytes:
+        """Feed a local file to digest (md5 or xxh3) and return the raw digest."""
+        with path.open("rb", buffering=0) as handle:
+            size = os.fstat(handle.fileno()).st_size
+            if 0 < size <= MD5_MMAP_MAX_SIZE:
+                try:
+                    mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    mapped = None  # e.g. special files; use the read loop below
+                if mapped is not None:
+                    # One update() over the mapping: no per-chunk copies or
+                    # Python round-trips, and the GIL is released throughout
+                    with mapped:
+                        if hasattr(mapped, "madvise"):
+                            mapped.madvise(mmap.MADV_SEQUENTIAL)
+                        digest.update(mapped)
+                    # Verification reads each file once; don't let it evict
+                    # other workloads' page cache
+                    _fadvise(handle, "POSIX_FADV_DONTNEED")
+                    return digest.digest()
+            # Unbuffered readinto() straight into blksize-tuned buffers,
+            # reading the next block while the current one is hashed
+            _fadvise(handle, "POSIX_FADV_SEQUENTIAL")
+            _hash_stream(handle, digest)
+            _fadvise(handle, "POSIX_FADV_DONTNEED")
+            return digest.digest()